@@ -0,0 +1,224 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+    from django.db.models.query import QuerySet
+
+    # versions, list, size and expiry of an entry of `ObjectListCache`
+    ObjectListEntry = Tuple[tuple, List[Any], int, Optional[float]]
+
+# Standard libs
+from collections import OrderedDict
+import hashlib
+import json
+import pickle
+import threading
+import time
+import uuid
+
+# Django imports
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# DALEC imports
+from dalec import settings as app_settings
+
+__all__ = [
+    "ObjectListCache",
+    "get_object_list_cache",
+    "get_cache_key",
+    "get_versions",
+    "bump_version",
+    "get_object_list",
+]
+
+
+class ObjectListCache:
+    """
+    Per process LRU cache of evaluated lists of contents, bounded by a number of entries and an
+    approximate size in bytes (size of the pickled list).
+    Each entry is stored with the versions of the contents it depends on (see `get_versions`):
+    an entry with other versions is considered as missing. Entries also expire after `ttl`
+    seconds (if it's not None), in case versions are not shared by all processes (eg. a local
+    memory DALEC_CACHE).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: Optional[float] = None) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, ObjectListEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, versions: tuple) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry[3] is not None and entry[3] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None or entry[0] != versions:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, versions: tuple, object_list: List[Any]) -> bool:
+        """
+        Store the list and return True, or False if it can not be stored (too big or
+        impossible to pickle to get its size)
+        """
+        try:
+            size = len(pickle.dumps(object_list, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return False
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._remove(key)
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[key] = (versions, object_list, size, expires)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_object_list_cache: Optional[ObjectListCache] = None
+
+
+def get_object_list_cache() -> Optional[ObjectListCache]:
+    """
+    Return the cache of lists of contents of the current process, or None if it is disabled
+    (DALEC_LIST_CACHE_ENTRIES is 0)
+    """
+    global _object_list_cache
+    if not app_settings.LIST_CACHE_ENTRIES:
+        return None
+    if _object_list_cache is None:
+        _object_list_cache = ObjectListCache(
+            app_settings.LIST_CACHE_ENTRIES,
+            app_settings.LIST_CACHE_BYTES,
+            app_settings.LIST_CACHE_TTL,
+        )
+    return _object_list_cache
+
+
+def get_cache_key(
+    prefix: str,
+    app: str,
+    content_type: str,
+    channel: Optional[str],
+    channel_object: Optional[str],
+) -> str:
+    """
+    Return a key of DALEC_CACHE for this app + content_type [+ channel [+ channel object]]
+    """
+    temp_key = json.dumps([app, content_type, channel, channel_object])
+    return "dalec:%s:%s" % (prefix, hashlib.md5(temp_key.encode("utf-8")).hexdigest())
+
+
+def get_version_key(
+    app: str, content_type: str, channel: Optional[str], channel_object: Optional[str]
+) -> str:
+    return get_cache_key("version", app, content_type, channel, channel_object)
+
+
+def get_versions(keys: Iterable[Tuple[str, str, Optional[str], Optional[str]]]) -> Tuple[str, ...]:
+    """
+    Return current versions of contents of those (app, content_type, channel, channel_object).
+    Versions are stored in the cache (DALEC_CACHE) to be shared by all processes.
+    """
+    cache = caches[app_settings.CACHE]
+    version_keys = [get_version_key(*key) for key in keys]
+    versions = cache.get_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            # unknown (or evicted) version: contents could have changed
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            versions[version_key] = cache.get(version_key)
+    return tuple(versions[version_key] for version_key in version_keys)
+
+
+def bump_version(
+    app: str,
+    content_type: str,
+    channel: Optional[str] = None,
+    channel_object: Optional[str] = None,
+) -> None:
+    """
+    Invalidate, in all processes, cached lists which display contents of this
+    app + content_type [+ channel [+ channel object]]
+    """
+    if not app_settings.LIST_CACHE_ENTRIES:
+        return
+    cache = caches[app_settings.CACHE]
+    version_key = get_version_key(app, content_type, channel, channel_object)
+    cache.set(version_key, uuid.uuid4().hex, timeout=None)
+
+
+def get_object_list(
+    key: Hashable,
+    app: str,
+    content_type: str,
+    channel: Optional[str],
+    channel_objects: Optional[Iterable[str]],
+    queryset: QuerySet,
+) -> List[Any]:
+    """
+    Return the evaluated queryset, from the cache of lists of contents if they did not change
+    since it has been stored
+    """
+    object_list_cache = get_object_list_cache()
+    if object_list_cache is None:
+        return list(queryset)
+    versions = get_versions(
+        (app, content_type, channel, channel_object)
+        for channel_object in (channel_objects or [None])  # type: ignore
+    )
+    object_list = object_list_cache.get(key, versions)
+    if object_list is None:
+        object_list = list(queryset)
+        object_list_cache.set(key, versions, object_list)
+    return object_list
+
+
+@receiver(setting_changed)
+def clear_object_list_cache(**kwargs: Any) -> None:
+    """
+    Forget the cache (and its size limits) when a setting changes (mainly in tests)
+    """
+    global _object_list_cache
+    _object_list_cache = None
@@ -0,0 +1,112 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Optional, Type
+
+# Standard libs
+import json
+import zlib
+
+# Django imports
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+__all__ = ["CompressedJSONField"]
+
+
+class CompressedJSON:
+    """
+    Compressed JSON loaded from the DB, only decoded when the field is accessed
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def decode(self) -> Any:
+        return json.loads(zlib.decompress(self.data).decode("utf-8"))
+
+
+class CompressedJSONDescriptor:
+    """
+    Decode the compressed JSON the first time the attribute is read
+    """
+
+    def __init__(self, field: CompressedJSONField) -> None:
+        self.field = field
+
+    def __get__(self, instance: Optional[models.Model], cls: Optional[Type] = None) -> Any:
+        if instance is None:
+            return self
+        attname = self.field.attname
+        if attname not in instance.__dict__:
+            # deferred field
+            instance.refresh_from_db(fields=[attname])
+        value = instance.__dict__[attname]
+        if isinstance(value, CompressedJSON):
+            value = instance.__dict__[attname] = value.decode()
+        return value
+
+    def __set__(self, instance: models.Model, value: Any) -> None:
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Store JSON compressed with zlib. It can replace the `content_data` JSONField of your
+    content model to reduce size of your table, but keys of the JSON can not be used in queries
+    anymore (eg. `ordered_by` or `DALEC_LIST_FIELDS`).
+    """
+
+    description = "Compressed JSON"
+
+    def __init__(
+        self,
+        *args: Any,
+        encoder: Type[json.JSONEncoder] = DjangoJSONEncoder,
+        level: int = 6,
+        **kwargs: Any,
+    ) -> None:
+        self.encoder = encoder
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self) -> tuple:
+        name, path, args, kwargs = super().deconstruct()
+        if self.encoder is not DjangoJSONEncoder:
+            kwargs["encoder"] = self.encoder
+        if self.level != 6:
+            kwargs["level"] = self.level
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls: Type[models.Model], name: str, **kwargs: Any) -> None:
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, CompressedJSONDescriptor(self))
+
+    def from_db_value(self, value: Any, expression: Any, connection: Any) -> Any:
+        if value is None:
+            return value
+        return CompressedJSON(bytes(value))
+
+    def to_python(self, value: Any) -> Any:
+        if isinstance(value, str):
+            # serialized value (see `value_to_string`)
+            return json.loads(value)
+        return value
+
+    def get_prep_value(self, value: Any) -> Any:
+        if value is None:
+            return value
+        if isinstance(value, CompressedJSON):
+            # never decoded so never changed: no need to compress it again
+            return value.data
+        data = json.dumps(value, cls=self.encoder, separators=(",", ":"))
+        return zlib.compress(data.encode("utf-8"), self.level)
+
+    def value_to_string(self, obj: models.Model) -> str:
+        return json.dumps(self.value_from_object(obj), cls=self.encoder)
@@ -0,0 +1,48 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+    from django.core.management.base import CommandParser
+
+# Standard libs
+import gzip
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# DALEC imports
+from dalec.snapshot import dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Write contents and fetch histories into a gzipped snapshot (one JSON object by line) "
+        "to warm start another database with dalec_load."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="Path of the snapshot (eg. dalec.ndjson.gz)")
+        parser.add_argument(
+            "--app",
+            action="append",
+            dest="apps",
+            default=None,
+            help="Only dump contents of this app (can be used many times)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows read at once (default: 1000)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with gzip.open(options["path"], "wt", encoding="utf-8") as stream:
+            counts = dump(stream, options["apps"], options["chunk_size"])
+        if options["verbosity"]:
+            for label, count in counts.items():
+                self.stdout.write("%d %s dumped" % (count, label))
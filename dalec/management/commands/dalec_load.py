@@ -0,0 +1,41 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+    from django.core.management.base import CommandParser
+
+# Standard libs
+import gzip
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# DALEC imports
+from dalec.snapshot import load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a snapshot written by dalec_dump into an empty database, to display contents "
+        "without fetching all of them from external sources first."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="Path of the snapshot (eg. dalec.ndjson.gz)")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted at once (default: 1000)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with gzip.open(options["path"], "rt", encoding="utf-8") as stream:
+            counts = load(stream, options["chunk_size"])
+        if options["verbosity"]:
+            for label, count in counts.items():
+                self.stdout.write("%d %s loaded" % (count, label))
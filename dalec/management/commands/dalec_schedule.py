@@ -0,0 +1,26 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# DALEC imports
+from dalec.popularity import schedule_refreshes
+
+
+class Command(BaseCommand):
+    help = (
+        "Ask refresh workers to refresh contents which are displayed often (DALEC_HOT_VIEWS) "
+        "before they expire. Run it periodically (eg. every minute with cron)."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        nb_scheduled = schedule_refreshes()
+        if options["verbosity"]:
+            self.stdout.write("%d refreshes scheduled" % nb_scheduled)
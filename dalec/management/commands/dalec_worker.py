@@ -0,0 +1,75 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+    from django.core.management.base import CommandParser
+
+# Standard libs
+import time
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# DALEC imports
+from dalec.queue import claim_jobs
+from dalec.queue import process_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh contents queued by web requests or a scheduler. "
+        "Any number of workers can run at the same time, on any number of nodes."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Number of jobs claimed at once by this worker (default: 10)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait before looking for new jobs when there are none (default: 5)",
+        )
+        parser.add_argument(
+            "--batch-commit",
+            action="store_true",
+            default=False,
+            help=(
+                "Write all refreshes of a batch with only one commit (the transaction stays "
+                "open while contents are fetched)"
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            default=False,
+            help="Process all waiting jobs and then exit instead of waiting for new ones",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        nb_done = nb_failed = 0
+        try:
+            while True:
+                jobs = claim_jobs(options["batch_size"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+                failed = process_jobs(jobs, batch_commit=options["batch_commit"])
+                nb_done += len(jobs) - len(failed)
+                nb_failed += len(failed)
+                for job in failed:
+                    self.stderr.write("Refresh failed for %s: %s" % (job.key, job.last_error))
+        except KeyboardInterrupt:
+            pass
+        if options["verbosity"]:
+            self.stdout.write("%d refreshes done, %d failed" % (nb_done, nb_failed))
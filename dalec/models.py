@@ -1,17 +1,228 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
 try:
     # Django imports
     from django.db.models import JSONField  # type: ignore
 except ImportError:
     from django_jsonfield_backport.models import JSONField  # type: ignore
 
+try:
+    # Django imports
+    from django.db.models.fields.json import KeyTransform  # type: ignore
+    from django.db.models.fields.json import compile_json_path  # type: ignore
+except ImportError:
+    # Django < 3.1: contents are always fully loaded
+    KeyTransform = None
+
 # Django imports
+from django.apps import apps
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models.query import ModelIterable
+from django.utils.dateparse import parse_datetime
 from django.utils.translation import gettext_lazy as _
 
-__all__ = ["FetchHistoryBase", "ContentBase"]
+# DALEC imports
+from dalec import settings as app_settings
+
+__all__ = [
+    "FetchHistoryBase",
+    "ContentBase",
+    "ContentQuerySet",
+    "RefreshJobBase",
+    "PayloadBase",
+    "get_content_model",
+    "get_payload_model",
+    "parse_datetime_keys",
+]
+
+
+def get_content_model(app: Optional[str] = None) -> Type[ContentBase]:
+    """
+    Return the model storing contents of this app (DALEC_<APP>_CONTENT_MODEL if it's set, or
+    DALEC_CONTENT_MODEL shared by all apps)
+    """
+    return apps.get_model(app_settings.get_for("CONTENT_MODEL", app))
+
+
+def get_payload_model() -> Optional[type]:
+    """
+    Return the model storing payloads shared by channels (DALEC_PAYLOAD_MODEL) or None if
+    contents are stored in each channel (default)
+    """
+    if not app_settings.PAYLOAD_MODEL:
+        return None
+    return apps.get_model(app_settings.PAYLOAD_MODEL)
+
+
+def parse_datetime_keys(data: dict, keys: Iterable[str]) -> dict:
+    """
+    Convert back to datetimes (in place) those keys of a JSON decoded `data`
+    """
+    for key in keys:
+        value = data.get(key, None)
+        if isinstance(value, str):
+            data[key] = parse_datetime(value) or value
+    return data
+
+
+if KeyTransform is not None:
+
+    class ContentDataKey(KeyTransform):  # type: ignore
+        """
+        Extract a key of `content_data` as JSON.
+        SQLite's JSON_EXTRACT returns strings unquoted so "123" would be decoded as 123:
+        we quote them again.
+        """
+
+        def as_sqlite(self, compiler: Any, connection: Any) -> Tuple[str, tuple]:
+            sql, params = super().as_sqlite(compiler, connection)
+            lhs, lhs_params, key_transforms = self.preprocess_lhs(compiler, connection)
+            json_path = compile_json_path(key_transforms)
+            return (
+                "(CASE WHEN JSON_TYPE(%s, %%s) = 'text' "
+                "THEN JSON_QUOTE(JSON_EXTRACT(%s, %%s)) ELSE %s END)"
+            ) % (lhs, lhs, sql), (*lhs_params, json_path, *lhs_params, json_path, *params)
+
+
+class ContentFieldsIterable(ModelIterable):
+    """
+    Iterable which rebuilds `content_data` from the keys extracted by the DB
+    """
+
+    def __iter__(self) -> Iterator[models.Model]:
+        aliases = self.queryset._content_fields
+        for obj in super().__iter__():
+            obj.content_data = {key: obj.__dict__.pop(alias) for key, alias in aliases.items()}
+            yield obj
+
+
+class ContentQuerySet(models.QuerySet):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._content_fields: dict = {}
+        self._payload_fields: Optional[List[str]] = None
+        self._with_payloads = False
+
+    def _clone(self) -> ContentQuerySet:
+        clone = super()._clone()  # type: ignore
+        clone._content_fields = self._content_fields
+        clone._payload_fields = self._payload_fields
+        clone._with_payloads = self._with_payloads
+        return clone
+
+    def _fetch_all(self) -> None:
+        fetched = self._result_cache is None
+        super()._fetch_all()  # type: ignore
+        if fetched and self._result_cache and isinstance(self._result_cache[0], models.Model):
+            if self._with_payloads:
+                self._hydrate_payloads(self._result_cache)
+            self._type_datetimes(self._result_cache)
+
+    def _type_datetimes(self, contents: List[ContentBase]) -> None:
+        """
+        Convert back to datetimes the keys of `content_data` which were datetimes when contents
+        have been stored (see DALEC_TYPED_DATES)
+        """
+        for content in contents:
+            keys = content.__dict__.get("datetime_keys", None)
+            if keys:
+                parse_datetime_keys(content.content_data, keys)
+
+    def _hydrate_payloads(self, contents: List[ContentBase]) -> None:
+        """
+        Replace `content_data` of contents by their shared payload, with one query
+        """
+        payload_model = get_payload_model()
+        lookups: Dict[tuple, set] = {}
+        for content in contents:
+            lookups.setdefault((content.app, content.content_type), set()).add(content.content_id)
+        query = Q()
+        for (app, content_type), content_ids in lookups.items():
+            query |= Q(app=app, content_type=content_type, content_id__in=content_ids)
+        payloads = payload_model.objects.filter(query)  # type: ignore
+        if self._payload_fields:
+            payloads = payloads.only_content_fields(self._payload_fields)
+        data = {
+            (payload.app, payload.content_type, payload.content_id): payload.content_data
+            for payload in payloads
+        }
+        for content in contents:
+            content.content_data = data.get(
+                (content.app, content.content_type, content.content_id), {}
+            )
+
+    def with_payloads(self, fields: Optional[Iterable[str]] = None) -> ContentQuerySet:
+        """
+        Load `content_data` from the shared payloads (see DALEC_PAYLOAD_MODEL), optionally only
+        those keys (see `only_content_fields`).
+        Returns the queryset unchanged if contents are stored in each channel.
+        """
+        if get_payload_model() is None or self._with_payloads:
+            return self
+        clone = self.defer("content_data")
+        clone._with_payloads = True
+        clone._payload_fields = list(fields) if fields else None
+        return clone
+
+    def order_by_content(self, *keys: str) -> ContentQuerySet:
+        """
+        Order contents by keys of `content_data` (prefixed by "-" for a descending order), from
+        the shared payloads if they are used (see DALEC_PAYLOAD_MODEL).
+        """
+        payload_model = get_payload_model()
+        if payload_model is None:
+            return self.order_by(
+                *[
+                    "%scontent_data__%s" % ("-" if key.startswith("-") else "", key.lstrip("-"))
+                    for key in keys
+                ]
+            )
+        payloads = payload_model.objects.filter(  # type: ignore
+            app=OuterRef("app"),
+            content_type=OuterRef("content_type"),
+            content_id=OuterRef("content_id"),
+        )
+        annotations = {}
+        ordering = []
+        for i, key in enumerate(keys):
+            alias = "_payload_order_%d" % i
+            annotations[alias] = Subquery(
+                payloads.values("content_data__%s" % key.lstrip("-"))[:1]
+            )
+            ordering.append("%s%s" % ("-" if key.startswith("-") else "", alias))
+        return self.annotate(**annotations).order_by(*ordering)
+
+    def only_content_fields(self, fields: Iterable[str]) -> ContentQuerySet:
+        """
+        Only load those keys of `content_data` instead of the whole JSON.
+        Missing keys will be set to `None`.
+        Returns the queryset unchanged (full contents) if there are no fields or if the DB can
+        not extract them (`content_data` is not a JSONField or Django < 3.1).
+        """
+        if not fields or self._content_fields or KeyTransform is None:
+            return self
+        if not isinstance(self.model._meta.get_field("content_data"), JSONField):
+            return self
+        aliases = {key: "_content_data_%d" % i for i, key in enumerate(fields)}
+        clone = self.defer("content_data").annotate(
+            **{alias: ContentDataKey(key, "content_data") for key, alias in aliases.items()}
+        )
+        clone._content_fields = aliases
+        clone._iterable_class = ContentFieldsIterable
+        return clone
 
 
 class FetchHistoryBase(models.Model):
@@ -28,6 +239,29 @@ class FetchHistoryBase(models.Model):
     channel_object = models.CharField(
         _("channel app object id"), max_length=255, null=True, blank=True
     )
+    change_rate = models.FloatField(
+        _("change rate"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "Moving average of the fetches which changed contents (between 0 and 1), used to "
+            "adapt the TTL (see DALEC_TTL_MIN and DALEC_TTL_MAX)."
+        ),
+    )
+    views = models.PositiveIntegerField(
+        _("views"),
+        default=0,
+        help_text=_("Number of times contents have been displayed since the last fetch."),
+    )
+    http_validators = JSONField(
+        _("HTTP validators"),
+        default=dict,
+        blank=True,
+        help_text=_(
+            "Validators (url, ETag, Last-Modified, content hash) of the last response of the "
+            "external source, used to avoid downloading / parsing the same contents again."
+        ),
+    )
 
     class Meta:
         verbose_name = _("Content fetch history line")
@@ -103,6 +337,17 @@ class ContentBase(models.Model):
         help_text=_("ID of the content inside the external app."),
     )
     content_data = JSONField(encoder=DjangoJSONEncoder)
+    datetime_keys = JSONField(
+        _("datetime keys"),
+        default=list,
+        blank=True,
+        help_text=_(
+            "Keys of the content data which are datetimes, converted back to datetimes when "
+            "contents are loaded (see DALEC_TYPED_DATES)."
+        ),
+    )
+
+    objects = ContentQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Content")
@@ -111,3 +356,73 @@ class ContentBase(models.Model):
         get_latest_by = "last_update_dt"
         abstract = True
         indexes = [models.Index(fields=["app", "content_type", "channel", "channel_object"])]
+
+
+class RefreshJobBase(models.Model):
+    """
+    Stores a refresh to do by a worker for a specific dalec's app [+ channel [+ channel obj]]
+    """
+
+    key = models.CharField(_("key"), max_length=32, null=False, blank=False, unique=True)
+    creation_dt = models.DateTimeField(_("creation datetime"), auto_now_add=True)
+    claimed_dt = models.DateTimeField(_("claimed datetime"), null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    priority = models.PositiveIntegerField(
+        _("priority"),
+        default=0,
+        help_text=_("Jobs with the highest priority are claimed first by workers."),
+    )
+    last_error = models.TextField(_("last error"), blank=True, default="")
+    force = models.BooleanField(
+        _("force"),
+        default=False,
+        help_text=_(
+            "Refresh contents even if their TTL did not expire yet (eg. popular contents "
+            "refreshed ahead of expiry)."
+        ),
+    )
+    app = models.CharField(_("dalec app"), max_length=50, null=False, blank=False)
+    content_type = models.CharField(_("content type"), max_length=50, null=True, blank=True)
+    channel = models.CharField(_("channel"), max_length=50, null=True, blank=True)
+    channel_object = models.CharField(
+        _("channel app object id"), max_length=255, null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = _("Refresh job")
+        verbose_name_plural = _("Refresh jobs")
+        ordering = ("-priority", "creation_dt")
+        abstract = True
+
+
+class PayloadBase(models.Model):
+    """
+    Stores once the data of a content displayed in many channels (see DALEC_PAYLOAD_MODEL).
+    Contents are then only light memberships of channels.
+    """
+
+    app = models.CharField(_("dalec app"), max_length=50, null=False, blank=False)
+    content_type = models.CharField(_("content type"), max_length=50, null=True, blank=True)
+    content_id = models.CharField(
+        _("app's content id"),
+        max_length=255,
+        null=False,
+        blank=False,
+        help_text=_("ID of the content inside the external app."),
+    )
+    digest = models.CharField(
+        _("digest"),
+        max_length=64,
+        null=False,
+        blank=False,
+        help_text=_("Hash of the content data, used to avoid useless updates."),
+    )
+    content_data = JSONField(encoder=DjangoJSONEncoder)
+
+    objects = ContentQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Payload")
+        verbose_name_plural = _("Payloads")
+        abstract = True
+        unique_together = [("app", "content_type", "content_id")]
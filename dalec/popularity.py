@@ -0,0 +1,128 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Tuple
+
+    ViewKey = Tuple[str, str, Optional[str], Optional[str]]
+
+# Standard libs
+from datetime import timedelta
+import threading
+import time
+
+# Django imports
+from django.apps import apps
+from django.db.models import F
+from django.utils import timezone
+
+# DALEC imports
+from dalec import settings as app_settings
+from dalec.proxy import ProxyPool
+from dalec.queue import enqueue_prioritized
+
+__all__ = ["ViewCounter", "view_counter", "record_views", "get_hot_keys", "schedule_refreshes"]
+
+
+class ViewCounter:
+    """
+    Count displays of contents by app + content_type + channel + channel object in memory and
+    add them to `FetchHistory.views` in batches, at most every DALEC_VIEWS_FLUSH_INTERVAL
+    seconds, instead of writing into the DB at each display.
+    Views are only a popularity hint: counts not flushed yet when a process stops are lost.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Dict[ViewKey, int] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, keys: Iterable[ViewKey]) -> None:
+        with self._lock:
+            for key in keys:
+                self._counts[key] = self._counts.get(key, 0) + 1
+            flush = time.monotonic() - self._last_flush >= app_settings.VIEWS_FLUSH_INTERVAL
+        if flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered counts into the DB and return the number of updated keys
+        """
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+        model = apps.get_model(app_settings.FETCH_HISTORY_MODEL)
+        for (app, content_type, channel, channel_object), nb_views in counts.items():
+            # same lookup as `Proxy.get_last_fetch`
+            qs = model.objects.filter(app=app, content_type=content_type)
+            if channel:
+                qs = qs.filter(channel=channel)
+            if channel_object:
+                qs = qs.filter(channel_object=channel_object)
+            else:
+                qs = qs.filter(channel_object__isnull=True)
+            qs.update(views=F("views") + nb_views)
+        return len(counts)
+
+
+view_counter = ViewCounter()
+
+
+def record_views(
+    app: str,
+    content_type: str,
+    channel: Optional[str] = None,
+    channel_objects: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Count a display of contents of this app + content_type [+ channel [+ channel objects]] if
+    DALEC_COUNT_VIEWS is enabled
+    """
+    if not app_settings.get_for("COUNT_VIEWS", app, content_type):
+        return
+    view_counter.record(
+        (app, content_type, channel, channel_object)
+        for channel_object in (channel_objects or [None])  # type: ignore
+    )
+
+
+def get_hot_keys() -> List[Tuple[ViewKey, int]]:
+    """
+    Return (app, content_type, channel, channel_object) displayed at least DALEC_HOT_VIEWS
+    times since their last fetch and which will expire soon (their age is more than
+    DALEC_REFRESH_AHEAD times their TTL, see `Proxy.get_ttl`), with their number of views, most
+    viewed first.
+    """
+    model = apps.get_model(app_settings.FETCH_HISTORY_MODEL)
+    qs = model.objects.filter(views__gte=app_settings.HOT_VIEWS).order_by("-views")
+    now = timezone.now()
+    hot_keys = []
+    for fetch in qs:
+        try:
+            proxy = ProxyPool.get(fetch.app)
+        except ValueError:
+            continue
+        ttl = proxy.get_ttl(fetch.content_type, fetch)
+        if fetch.last_fetch_dt <= now - timedelta(seconds=ttl * app_settings.REFRESH_AHEAD):
+            key = (fetch.app, fetch.content_type, fetch.channel, fetch.channel_object)
+            hot_keys.append((key, fetch.views))
+    return hot_keys
+
+
+def schedule_refreshes() -> int:
+    """
+    Ask workers to refresh hot keys (see `get_hot_keys`) before they expire, with a priority
+    equal to their number of views. Cold keys are only refreshed when they are displayed.
+    Return the number of keys scheduled.
+    """
+    view_counter.flush()
+    hot_keys = get_hot_keys()
+    # hot keys did not expire yet: workers must refresh them anyway
+    enqueue_prioritized(hot_keys, force=True)
+    return len(hot_keys)
@@ -5,18 +5,35 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Dict, Union, Type, Optional, Tuple
+    from typing import Any, Dict, List, Set, Union, Type, Optional, Tuple
     from typing_extensions import Literal
     from django.db.models import Model
     from django.db.models.query import QuerySet
-    from dalec.models import ContentBase, FetchHistoryBase
+    from requests import Response
+    from importlib.metadata import EntryPoint
+    from dalec.models import ContentBase, FetchHistoryBase, PayloadBase
+
+    RefreshResult = Union[
+        Tuple[int, int, int], Tuple[Literal[False], Literal[False], Literal[False]]
+    ]
 
 # Standard libs
+from contextvars import ContextVar
+from datetime import datetime
 from datetime import timedelta
+from functools import lru_cache
+from functools import partial
+import hashlib
 from importlib import import_module
+import json
+import time
 
 # Django imports
 from django.apps import apps
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+from django.db import transaction
 from django.utils import timezone
 
 try:
@@ -25,10 +42,104 @@ try:
 except ImportError:
     from django.utils.functional import classproperty  # type: ignore
 
+try:
+    # Standard libs
+    from importlib.metadata import entry_points
+except ImportError:
+    try:
+        # Python libs
+        from importlib_metadata import entry_points  # type: ignore
+    except ImportError:
+        # Python < 3.8 without importlib_metadata: proxies are only autoloaded by convention
+        entry_points = None  # type: ignore
+
 # DALEC imports
 from dalec import settings as app_settings
+from dalec.cache import bump_version
+from dalec.cache import get_cache_key
+from dalec.models import get_content_model
+from dalec.models import get_payload_model
+from dalec.models import parse_datetime_keys
+from dalec.routers import pin_primary
+from dalec.timing import phase
+
+__all__ = [
+    "ProxyPool",
+    "Proxy",
+    "NotModified",
+    "RefreshManyError",
+    "parse_rate",
+    "get_proxy_entry_points",
+]
+
+ENTRY_POINTS_GROUP = "dalec.proxies"
 
-__all__ = ["ProxyPool", "Proxy"]
+# last fetch and new HTTP validators of the refresh in progress, used by `Proxy.http_get`
+_current_fetch: ContextVar[Optional[Tuple[Optional[FetchHistoryBase], dict]]] = ContextVar(
+    "dalec_current_fetch", default=None
+)
+
+
+REQUIRED_CONTENT_FIELDS = ("id", "creation_dt", "last_update_dt")
+
+# the lock of a rate limit bucket (see `Proxy.acquire_rate_limit`) is waited for at most
+# ATTEMPTS * WAIT seconds and released after TIMEOUT seconds if its process died
+RATE_LIMIT_LOCK_ATTEMPTS = 20
+RATE_LIMIT_LOCK_WAIT = 0.005
+RATE_LIMIT_LOCK_TIMEOUT = 5
+
+
+class RefreshManyError(Exception):
+    """
+    Raised by `Proxy.refresh_many` once all channel objects have been refreshed if some of them
+    failed: `results` are the results of the refreshed ones and `errors` the exception raised
+    for each failed one.
+    """
+
+    def __init__(self, results: Dict[str, RefreshResult], errors: Dict[str, Exception]) -> None:
+        super().__init__(
+            "Refresh failed for %s"
+            % ", ".join("%s (%r)" % (channel_object, e) for channel_object, e in errors.items())
+        )
+        self.results = results
+        self.errors = errors
+
+
+class NotModified(Exception):
+    """
+    Raised while fetching contents if the external source did not change since the last fetch.
+    The refresh then stops without touching contents.
+    """
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Return the number of tokens and the period (in seconds) of a rate limit like "60/minute"
+    (period can be second, minute, hour or day or only their first letter)
+    """
+    nb_tokens, period = rate.split("/")
+    return int(nb_tokens), {"s": 1, "m": 60, "h": 3600, "d": 86400}[period.strip()[0]]
+
+
+@lru_cache(maxsize=None)
+def get_proxy_entry_points() -> Dict[str, EntryPoint]:
+    """
+    Return entry points of the "dalec.proxies" group by app. Packages can declare their proxy
+    (a `Proxy` class or the module defining it) in their metadata, eg. in setup.cfg:
+
+    [options.entry_points]
+    dalec.proxies =
+        gitlab = dalec_gitlab.proxy:GitlabProxy
+    """
+    if entry_points is None:
+        return {}
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        group = all_entry_points.select(group=ENTRY_POINTS_GROUP)
+    else:
+        # Python < 3.10
+        group = all_entry_points.get(ENTRY_POINTS_GROUP, [])  # type: ignore
+    return {entry_point.name: entry_point for entry_point in group}
 
 
 class ProxyPool:
@@ -72,9 +183,19 @@ class ProxyPool:
         """
         if app not in cls._proxies:
             if autoload:
-                # try to load the proxy module from dalec_<app>.
+                # try to load the proxy declared by an entry point or the module dalec_<app>.proxy
+                entry_point = get_proxy_entry_points().get(app, None)
                 try:
-                    import_module("dalec_%s.proxy" % app)
+                    if entry_point is not None:
+                        loaded = entry_point.load()
+                        if (
+                            isinstance(loaded, type)
+                            and issubclass(loaded, Proxy)
+                            and app not in cls._proxies
+                        ):
+                            cls.register(loaded)
+                    else:
+                        import_module("dalec_%s.proxy" % app)
                 except ImportError as e:
                     raise ValueError(
                         (
@@ -91,6 +212,14 @@ class ProxyPool:
     def get_registered_apps(cls) -> Tuple[str, ...]:
         return tuple(cls._proxies.keys())
 
+    @classmethod
+    def get_available_apps(cls) -> Tuple[str, ...]:
+        """
+        Return apps of registered proxies and of proxies declared by entry points (without
+        loading them)
+        """
+        return tuple(sorted(set(cls._proxies.keys()).union(get_proxy_entry_points().keys())))
+
 
 class ProxyMeta(type):
     """
@@ -116,13 +245,15 @@ class Proxy(metaclass=ProxyMeta):
     """
 
     app: Optional[str] = None
+    # keys of contents to store, by content type (see `get_content_fields`)
+    content_fields: Dict[str, List[str]] = {}
 
     @classproperty
     def content_model(cls) -> Type[ContentBase]:
         """
-        class attribute to easely get the Content model
+        class attribute to easely get the Content model of this app
         """
-        return apps.get_model(app_settings.CONTENT_MODEL)
+        return get_content_model(cls.app)
 
     @classproperty
     def fetch_history_model(cls) -> Type[FetchHistoryBase]:
@@ -131,6 +262,13 @@ class Proxy(metaclass=ProxyMeta):
         """
         return apps.get_model(app_settings.FETCH_HISTORY_MODEL)
 
+    @classproperty
+    def payload_model(cls) -> Optional[Type[PayloadBase]]:
+        """
+        class attribute to easely get the Payload model (None if payloads are not shared)
+        """
+        return get_payload_model()
+
     def refresh(
         self,
         content_type: str,
@@ -138,7 +276,7 @@ class Proxy(metaclass=ProxyMeta):
         channel_object: Optional[str] = None,
         force: Optional[bool] = False,
         dj_channel_obj: Optional[Model] = None,
-    ) -> Union[Tuple[int, int, int], Tuple[Literal[False], Literal[False], Literal[False]]]:
+    ) -> RefreshResult:
         """
         Fetch updated contents from the source and update/create it into the DB.
         Then, if some contents has been created, delete oldests contents which are not anymore
@@ -150,17 +288,219 @@ class Proxy(metaclass=ProxyMeta):
             "channel": channel,
             "channel_object": channel_object,
         }
-        last_fetch = None if force else self.get_last_fetch(**dalec_kwargs)  # type: ignore
-        if last_fetch:
-            too_old = timezone.now() - timedelta(seconds=app_settings.TTL)
-            if last_fetch.last_fetch_dt > too_old:
+        with phase("ttl"):
+            if not force and self.is_fresh_in_cache(**dalec_kwargs):  # type: ignore
+                return False, False, False
+            last_fetch = None if force else self.get_last_fetch(**dalec_kwargs)  # type: ignore
+            if self.is_fresh(content_type, last_fetch):
                 # last request is still too recent: we do not spam the external app
                 return False, False, False
+        return self.refresh_expired(
+            last_fetch=last_fetch, dj_channel_obj=dj_channel_obj, **dalec_kwargs  # type: ignore
+        )
+
+    def refresh_many(
+        self,
+        content_type: str,
+        channel: Optional[str],
+        channel_objects: List[str],
+        force: Optional[bool] = False,
+    ) -> Dict[str, RefreshResult]:
+        """
+        Same as `refresh` for many channel objects of a channel.
+        If the proxy implements `_fetch_many`, contents of all expired channel objects are
+        fetched at once.
+        returns a dict with the `refresh` result of each channel object
+        Channel objects are stored one by one: if some of them fail, the others are still
+        stored then `RefreshManyError` is raised with the results and errors of each of them.
+        """
+        with phase("ttl"):
+            if force:
+                expired: Dict[str, Optional[FetchHistoryBase]] = dict.fromkeys(channel_objects)
+            else:
+                expired = self.get_expired(content_type, channel, channel_objects)
+        results: Dict[str, RefreshResult] = {
+            channel_object: (False, False, False)
+            for channel_object in channel_objects
+            if channel_object not in expired
+        }
+        if not expired:
+            return results
+        errors: Dict[str, Exception] = {}
+        if type(self)._fetch_many is Proxy._fetch_many:
+            for channel_object, last_fetch in expired.items():
+                try:
+                    results[channel_object] = self.refresh_expired(
+                        content_type, channel, channel_object, last_fetch
+                    )
+                except Exception as e:
+                    errors[channel_object] = e
+            if errors:
+                raise RefreshManyError(results, errors)
+            return results
+        if not self.acquire_rate_limit(content_type, channel):
+            # too many requests sent to the external app: stored contents will do the job
+            results.update({channel_object: (False, False, False) for channel_object in expired})
+            return results
+        nb = app_settings.get_for("NB_CONTENTS_KEPT", self.app, content_type)
+        with phase("fetch"):
+            fetched = self._fetch_many(nb, content_type, channel, list(expired.keys()))
+        for channel_object, last_fetch in expired.items():
+            try:
+                with phase("store"), self.atomic():
+                    results[channel_object] = self.store_contents(
+                        fetched.get(channel_object, {}), content_type, channel, channel_object
+                    )
+                    self.set_last_fetch(
+                        content_type,
+                        channel,  # type: ignore
+                        channel_object,
+                        last_fetch=last_fetch,
+                        changed=any(results[channel_object]),
+                    )
+            except Exception as e:
+                self.set_failed_fetch(content_type, channel, channel_object, last_fetch)
+                errors[channel_object] = e
+        if errors:
+            raise RefreshManyError(results, errors)
+        return results
+
+    def refresh_expired(
+        self,
+        content_type: str,
+        channel: Optional[str],
+        channel_object: Optional[str],
+        last_fetch: Optional[FetchHistoryBase],
+        dj_channel_obj: Optional[Model] = None,
+    ) -> RefreshResult:
+        """
+        Fetch and store contents which are known to be expired (see `refresh`)
+        """
+        dalec_kwargs = {
+            "content_type": content_type,
+            "channel": channel,
+            "channel_object": channel_object,
+        }
+        if not self.acquire_rate_limit(**dalec_kwargs):  # type: ignore
+            # too many requests sent to the external app: stored contents will do the job
+            return False, False, False
         nb = app_settings.get_for("NB_CONTENTS_KEPT", self.app, content_type)
-        contents = self._fetch(nb, **dalec_kwargs)  # type: ignore
-        self.set_last_fetch(last_fetch=last_fetch, **dalec_kwargs)  # type: ignore
+        http_validators: dict = {}
+        token = _current_fetch.set((last_fetch, http_validators))
+        try:
+            with phase("fetch"):
+                contents = self._fetch(nb, **dalec_kwargs)  # type: ignore
+        except NotModified:
+            contents = {}
+        finally:
+            _current_fetch.reset(token)
+        try:
+            with phase("store"), self.atomic():
+                result = self.store_contents(
+                    contents, dj_channel_obj=dj_channel_obj, **dalec_kwargs  # type: ignore
+                )
+                self.set_last_fetch(
+                    last_fetch=last_fetch,
+                    http_validators=http_validators,
+                    changed=any(result),
+                    **dalec_kwargs,  # type: ignore
+                )
+        except Exception:
+            self.set_failed_fetch(last_fetch=last_fetch, **dalec_kwargs)  # type: ignore
+            raise
+        return result
+
+    def set_failed_fetch(
+        self,
+        content_type: str,
+        channel: Optional[str],
+        channel_object: Optional[str],
+        last_fetch: Optional[FetchHistoryBase],
+    ) -> None:
+        """
+        Register a fetch whose contents could not be stored (their transaction is rolled back),
+        so next displays do not fetch the external source again before the TTL expires.
+        HTTP validators are not stored: next fetch must get the whole response again.
+        The change rate is kept: whether contents changed is unknown.
+        """
+        with self.atomic():
+            self.set_last_fetch(
+                content_type,
+                channel,  # type: ignore
+                channel_object,  # type: ignore
+                last_fetch=last_fetch,
+                changed=None,
+            )
+
+    def atomic(self) -> transaction.Atomic:
+        """
+        Return the transaction used to store contents and the fetch history of a refresh at
+        once: readers never see half refreshed lists and everything is written with one commit.
+        Next reads of the current request go to the primary DB (see `dalec.routers`).
+        """
+        pin_primary()
+        return transaction.atomic(using=router.db_for_write(self.content_model))
+
+    def store_contents(
+        self,
+        contents: Dict[str, dict],
+        content_type: str,
+        channel: Optional[str],
+        channel_object: Optional[str],
+        dj_channel_obj: Optional[Model] = None,
+    ) -> Tuple[int, int, int]:
+        """
+        Update/create fetched contents into the DB then delete oldest ones if needed.
+        returns number of created, updated and deleted objects
+        """
         if not contents:
             return 0, 0, 0
+        dalec_kwargs = {
+            "content_type": content_type,
+            "channel": channel,
+            "channel_object": channel_object,
+        }
+        fields = self.get_content_fields(content_type)
+        if fields:
+            kept_keys = set(fields).union(REQUIRED_CONTENT_FIELDS)
+            contents = {
+                content_id: {key: value for key, value in content.items() if key in kept_keys}
+                for content_id, content in contents.items()
+            }
+        datetime_keys: Dict[str, List[str]] = {}
+        if app_settings.get_for("TYPED_DATES", self.app, content_type):
+            # record which keys are datetimes, to convert them back when contents are loaded
+            datetime_keys = {
+                content_id: sorted(
+                    key for key, value in content.items() if isinstance(value, datetime)
+                )
+                for content_id, content in contents.items()
+            }
+        if self.payload_model is not None:
+            # contents only store the membership, their data are shared by all channels.
+            # Memberships are given as loaded from the DB to be compared with stored ones.
+            digests = self.store_payloads(content_type, contents)
+            contents = json.loads(
+                json.dumps(
+                    {
+                        content_id: {
+                            **{key: content[key] for key in REQUIRED_CONTENT_FIELDS},
+                            "digest": digests[content_id],
+                        }
+                        for content_id, content in contents.items()
+                    },
+                    cls=DjangoJSONEncoder,
+                )
+            )
+        if datetime_keys:
+            # contents are given as loaded from the DB to be compared with stored ones
+            contents = {
+                content_id: parse_datetime_keys(
+                    json.loads(json.dumps(content, cls=DjangoJSONEncoder)),
+                    datetime_keys[content_id],
+                )
+                for content_id, content in contents.items()
+            }
 
         nb_updated = 0
         to_update = self.get_contents_queryset(**dalec_kwargs).filter(  # type: ignore
@@ -168,24 +508,262 @@ class Proxy(metaclass=ProxyMeta):
         )
         for instance in to_update:
             new_content = contents.pop(instance.content_id)
-            res = self.update_content(instance=instance, new_content=new_content)
+            res = self.update_content(
+                instance=instance,
+                new_content=new_content,
+                datetime_keys=datetime_keys.get(instance.content_id, None),
+            )
             if res:
                 nb_updated += 1
 
         nb_created = 0
-        for new_content in contents.values():
+        for content_id, new_content in contents.items():
             res = self.create_content(
                 content=new_content,
                 dj_channel_obj=dj_channel_obj,
+                datetime_keys=datetime_keys.get(content_id, None),
                 **dalec_kwargs,  # type: ignore
             )
             if res:
                 nb_created += 1
         # exterminate the oldest ones if some new contents have been created
-        nb_deleted = 0 if not nb_created else self.exterminate(**dalec_kwargs)  # type: ignore
+        with phase("prune"):
+            nb_deleted = 0 if not nb_created else self.exterminate(**dalec_kwargs)  # type: ignore
+        if nb_created or nb_updated or nb_deleted:
+            # once committed: other processes must not cache the old list with the new version
+            transaction.on_commit(
+                partial(bump_version, self.app, **dalec_kwargs),  # type: ignore
+                using=router.db_for_write(self.content_model),
+            )
 
         return nb_created, nb_updated, nb_deleted
 
+    def store_payloads(self, content_type: str, contents: Dict[str, dict]) -> Dict[str, str]:
+        """
+        Update/create shared payloads of contents (see DALEC_PAYLOAD_MODEL) whose data changed
+        and return their digests by content id.
+        """
+        model = self.payload_model
+        digests = {
+            content_id: hashlib.sha256(
+                json.dumps(content, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            for content_id, content in contents.items()
+        }
+        qs = model.objects.filter(app=self.app, content_type=content_type)  # type: ignore
+        stored = dict(qs.filter(content_id__in=digests.keys()).values_list("content_id", "digest"))
+        to_create = []
+        updated = []
+        for content_id, digest in digests.items():
+            if content_id not in stored:
+                to_create.append(
+                    model(  # type: ignore
+                        app=self.app,
+                        content_type=content_type,
+                        content_id=content_id,
+                        digest=digest,
+                        content_data=contents[content_id],
+                    )
+                )
+            elif stored[content_id] != digest:
+                qs.filter(content_id=content_id).update(
+                    digest=digest, content_data=contents[content_id]
+                )
+                updated.append(content_id)
+        # another channel may have created the same payload in the meantime
+        model.objects.bulk_create(to_create, ignore_conflicts=True)  # type: ignore
+        if updated and app_settings.LIST_CACHE_ENTRIES:
+            # updated payloads are also displayed by other channels
+            channels = (
+                self.content_model.objects.filter(
+                    app=self.app, content_type=content_type, content_id__in=updated
+                )
+                .values_list("channel", "channel_object")
+                .distinct()
+            )
+            for channel, channel_object in channels:
+                bump = partial(
+                    bump_version, self.app, content_type, channel, channel_object  # type: ignore
+                )
+                transaction.on_commit(bump, using=router.db_for_write(self.content_model))
+        return digests
+
+    def get_content_fields(self, content_type: str) -> Optional[List[str]]:
+        """
+        Return keys of contents to store for this content type (None means all of them), from
+        the setting DALEC_<APP>_<CONTENT_TYPE>_FIELDS or the `content_fields` attribute.
+        Required keys (id, creation_dt and last_update_dt) are always stored.
+        """
+        fields = app_settings.get_for("FIELDS", self.app, content_type)
+        if fields is None:
+            fields = self.content_fields.get(content_type, None)
+        return fields
+
+    def is_fresh(self, content_type: str, last_fetch: Union[FetchHistoryBase, None]) -> bool:
+        """
+        Return True if the last fetch is still too recent to query again the external app
+        """
+        if not last_fetch:
+            return False
+        too_old = timezone.now() - timedelta(seconds=self.get_ttl(content_type, last_fetch))
+        return last_fetch.last_fetch_dt > too_old
+
+    def is_fresh_in_cache(
+        self,
+        content_type: str,
+        channel: Optional[str] = None,
+        channel_object: Optional[str] = None,
+    ) -> bool:
+        """
+        Return True if the cache (DALEC_CACHE) knows contents are still fresh, without any
+        query to the DB. Always False if DALEC_TTL_GATE is not enabled.
+        """
+        if not app_settings.get_for("TTL_GATE", self.app, content_type):
+            return False
+        key = get_cache_key(
+            "fresh", self.app, content_type, channel, channel_object  # type: ignore
+        )
+        return bool(caches[app_settings.CACHE].get(key))
+
+    def get_fresh_in_cache(
+        self, content_type: str, channel: Optional[str], channel_objects: List[str]
+    ) -> Set[str]:
+        """
+        Same as `is_fresh_in_cache` for many channel objects of a channel, with only one request
+        to the cache: return channel objects whose contents are still fresh.
+        """
+        if not app_settings.get_for("TTL_GATE", self.app, content_type):
+            return set()
+        keys = {
+            get_cache_key(
+                "fresh", self.app, content_type, channel, channel_object  # type: ignore
+            ): channel_object
+            for channel_object in channel_objects
+        }
+        cached = caches[app_settings.CACHE].get_many(list(keys))
+        return {keys[key] for key, value in cached.items() if value}
+
+    def set_fresh_in_cache(
+        self,
+        content_type: str,
+        channel: Optional[str],
+        channel_object: Optional[str],
+        last_fetch: FetchHistoryBase,
+    ) -> None:
+        """
+        Remember in the cache that contents are fresh until their TTL expires
+        (see `is_fresh_in_cache`)
+        """
+        if not app_settings.get_for("TTL_GATE", self.app, content_type):
+            return
+        key = get_cache_key(
+            "fresh", self.app, content_type, channel, channel_object  # type: ignore
+        )
+        caches[app_settings.CACHE].set(key, True, timeout=self.get_ttl(content_type, last_fetch))
+
+    def get_ttl(self, content_type: str, last_fetch: Optional[FetchHistoryBase] = None) -> float:
+        """
+        Return the number of seconds contents stay fresh after the last fetch: DALEC_TTL or,
+        if DALEC_TTL_MIN and DALEC_TTL_MAX are set, a TTL between them depending on the
+        observed change rate of contents (see `set_last_fetch`): the more often they change,
+        the shorter it is.
+        """
+        ttl = app_settings.get_for("TTL", self.app, content_type)
+        ttl_min = app_settings.get_for("TTL_MIN", self.app, content_type)
+        ttl_max = app_settings.get_for("TTL_MAX", self.app, content_type)
+        if ttl_min is None or ttl_max is None or not last_fetch:
+            return ttl
+        if last_fetch.change_rate is None:
+            return min(max(ttl, ttl_min), ttl_max)
+        return ttl_max - (ttl_max - ttl_min) * last_fetch.change_rate
+
+    def get_rate_limit_key(
+        self,
+        content_type: str,
+        channel: Optional[str] = None,
+        channel_object: Optional[str] = None,
+    ) -> str:
+        """
+        Return the key of the rate limit shared by this refresh: by default, all refreshes of
+        an app share the same one. Override it if you need, for example, a rate limit by host
+        of the external source.
+        """
+        return self.app  # type: ignore
+
+    def acquire_rate_limit(
+        self,
+        content_type: str,
+        channel: Optional[str] = None,
+        channel_object: Optional[str] = None,
+    ) -> bool:
+        """
+        Take a token from the rate limit (DALEC_RATE_LIMIT) of this refresh and return True, or
+        False if there are no available tokens.
+        The rate limit is a token bucket: it holds at most `nb_tokens` tokens and is refilled
+        continuously (`nb_tokens` by period), so bursts never exceed `nb_tokens` refreshes.
+        Its tokens and last refill time are stored in the cache (DALEC_CACHE) to be shared by
+        all processes, and updated under a short lock (`cache.add` is atomic).
+        """
+        rate = app_settings.get_for("RATE_LIMIT", self.app, content_type)
+        if not rate:
+            return True
+        nb_tokens, period = parse_rate(rate)
+        key = "dalec:rate:%s" % self.get_rate_limit_key(content_type, channel, channel_object)
+        cache = caches[app_settings.CACHE]
+        for attempt in range(RATE_LIMIT_LOCK_ATTEMPTS):
+            if cache.add(key + ":lock", True, timeout=RATE_LIMIT_LOCK_TIMEOUT):
+                break
+            time.sleep(RATE_LIMIT_LOCK_WAIT)
+        else:
+            # the bucket is too busy to be updated: stored contents will do the job
+            return False
+        try:
+            now = time.time()
+            # a bucket missing from the cache (expired or evicted) is full
+            tokens, last_refill = cache.get(key, None) or (nb_tokens, now)
+            tokens = min(nb_tokens, tokens + (now - last_refill) * nb_tokens / period)
+            acquired = tokens >= 1
+            if acquired:
+                tokens -= 1
+            # once full again, the bucket does not need to be stored anymore
+            cache.set(key, (tokens, now), timeout=period)
+        finally:
+            cache.delete(key + ":lock")
+        return acquired
+
+    def needs_refresh(
+        self,
+        content_type: str,
+        channel: Optional[str] = None,
+        channel_object: Optional[str] = None,
+    ) -> bool:
+        """
+        Return True if contents should be fetched again from the external app
+        """
+        if self.is_fresh_in_cache(content_type, channel, channel_object):
+            return False
+        last_fetch = self.get_last_fetch(content_type, channel, channel_object)  # type: ignore
+        return not self.is_fresh(content_type, last_fetch)
+
+    def get_expired(
+        self, content_type: str, channel: Optional[str], channel_objects: List[str]
+    ) -> Dict[str, Optional[FetchHistoryBase]]:
+        """
+        Same as `needs_refresh` for many channel objects of a channel but with only one cache
+        request and one query: return expired channel objects with their last fetch.
+        """
+        fresh = self.get_fresh_in_cache(content_type, channel, channel_objects)
+        channel_objects = [obj for obj in channel_objects if obj not in fresh]
+        if not channel_objects:
+            return {}
+        last_fetches = self.get_last_fetches(content_type, channel, channel_objects)
+        expired = {}
+        for channel_object in channel_objects:
+            last_fetch = last_fetches.get(channel_object, None)
+            if not self.is_fresh(content_type, last_fetch):
+                expired[channel_object] = last_fetch
+        return expired
+
     def create_content(
         self,
         content_type: str,
@@ -193,6 +771,7 @@ class Proxy(metaclass=ProxyMeta):
         channel_object: str,
         content: dict,
         dj_channel_obj: Optional[Model] = None,
+        datetime_keys: Optional[List[str]] = None,
     ) -> ContentBase:
         """
         Create a new instance of content and return it
@@ -207,19 +786,30 @@ class Proxy(metaclass=ProxyMeta):
             dj_channel_obj=dj_channel_obj,
             content_id=content["id"],
             content_data=content,
+            datetime_keys=datetime_keys or [],
         )
         instance.full_clean()
         instance.save()
         return instance
 
-    def update_content(self, instance: ContentBase, new_content: dict) -> bool:
+    def update_content(
+        self,
+        instance: ContentBase,
+        new_content: dict,
+        datetime_keys: Optional[List[str]] = None,
+    ) -> bool:
         """
         Update an existing instance of content and returns True if it really needed update
         """
-        if instance.content_data == new_content:
+        if instance.content_data == new_content and (
+            datetime_keys is None or instance.datetime_keys == datetime_keys
+        ):
             return False
         update_fields = ["content_data"]
         instance.content_data = new_content
+        if datetime_keys is not None and instance.datetime_keys != datetime_keys:
+            instance.datetime_keys = datetime_keys
+            update_fields.append("datetime_keys")
         if instance.creation_dt != new_content["creation_dt"]:
             instance.creation_dt = new_content["creation_dt"]
             update_fields.append("creation_dt")
@@ -246,6 +836,61 @@ class Proxy(metaclass=ProxyMeta):
             "You MUST implement your own _feth method depending your external source"
         )
 
+    def http_get(self, url: str, **kwargs: Any) -> Response:
+        """
+        Helper to GET `url` with `requests` from `_fetch`, for external sources which return
+        all the contents to refresh in one response. Keyword arguments are the `requests.get`
+        ones.
+
+        Validators of the last response (ETag and Last-Modified) are sent to the external source
+        (`If-None-Match` and `If-Modified-Since` headers) and stored for the next fetch.
+        Raise `NotModified` if the external source answers `304 Not Modified` or the same
+        body as the last fetch, which stops the refresh. Else, return the response (errors are
+        raised by `raise_for_status`).
+        """
+        # Python libs
+        import requests
+
+        last_fetch, http_validators = _current_fetch.get() or (None, {})
+        last_validators = last_fetch.http_validators if last_fetch else {}
+        headers = dict(kwargs.pop("headers", None) or {})
+        params = kwargs.pop("params", None)
+        url = requests.Request("GET", url, params=params).prepare().url  # type: ignore
+        if last_validators.get("url", None) == url:
+            if last_validators.get("etag", None):
+                headers.setdefault("If-None-Match", last_validators["etag"])
+            if last_validators.get("last_modified", None):
+                headers.setdefault("If-Modified-Since", last_validators["last_modified"])
+        else:
+            last_validators = {}
+        response = requests.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            raise NotModified(url)
+        response.raise_for_status()
+        http_validators.update(
+            {
+                "url": url,
+                "etag": response.headers.get("ETag", None),
+                "last_modified": response.headers.get("Last-Modified", None),
+                "content_hash": hashlib.sha256(response.content).hexdigest(),
+            }
+        )
+        if last_validators.get("content_hash", None) == http_validators["content_hash"]:
+            raise NotModified(url)
+        return response
+
+    def _fetch_many(
+        self, nb: int, content_type: str, channel: Optional[str], channel_objects: List[str]
+    ) -> Dict[str, Dict[str, dict]]:
+        """
+        Optional: if the external source can return contents of many channel objects at once,
+        fetch them and return a dict with, for each channel object, contents as returned by
+        `_fetch`. Missing channel objects are considered as having no contents.
+        """
+        raise NotImplementedError(
+            "Your proxy does not support to fetch many channel objects at once"
+        )
+
     def get_contents_queryset(
         self, content_type: str, channel: str, channel_object: str
     ) -> QuerySet:
@@ -265,7 +910,18 @@ class Proxy(metaclass=ProxyMeta):
         nb_to_keep = app_settings.get_for("NB_CONTENTS_KEPT", self.app, content_type)
         qs = self.get_contents_queryset(content_type, channel, channel_object)
         to_keep = qs.order_by("-last_update_dt").values_list("pk")[0:nb_to_keep]
-        result = qs.exclude(pk__in=to_keep).delete()
+        to_delete = qs.exclude(pk__in=to_keep)
+        if self.payload_model is not None:
+            content_ids = list(to_delete.values_list("content_id", flat=True))
+        result = to_delete.delete()
+        if self.payload_model is not None and content_ids:
+            # delete payloads which are not displayed in any channel anymore
+            still_used = self.content_model.objects.filter(
+                app=self.app, content_type=content_type, content_id__in=content_ids
+            ).values("content_id")
+            self.payload_model.objects.filter(
+                app=self.app, content_type=content_type, content_id__in=content_ids
+            ).exclude(content_id__in=still_used).delete()
         return result[1].get(model_label, 0)
 
     def set_last_fetch(
@@ -274,6 +930,8 @@ class Proxy(metaclass=ProxyMeta):
         channel: str,
         channel_object: str,
         last_fetch: Union[FetchHistoryBase, Literal[False], None] = False,
+        http_validators: Optional[dict] = None,
+        changed: Optional[bool] = None,
     ) -> FetchHistoryBase:
         """
         Uodate or create a FetchHistory instance to register the last fetch datetime
@@ -281,7 +939,11 @@ class Proxy(metaclass=ProxyMeta):
         if last_fetch is False, we avoid to query it (because we alreay know it does not exists)
         if last_fetch is None, we will try to get it via get_last_fetch
         else, it must be the last_fetch instance.
+        if http_validators are given (and not empty), they replace the stored ones.
+        if changed is given (True if the fetch created, updated or deleted contents), it
+        updates the moving average of the change rate (see DALEC_TTL_SMOOTHING).
         """
+        pin_primary()
         if last_fetch is None:
             last_fetch = self.get_last_fetch(content_type, channel, channel_object)
         if not last_fetch:
@@ -292,8 +954,29 @@ class Proxy(metaclass=ProxyMeta):
                 channel_object=channel_object,
             )
         last_fetch.last_fetch_dt = timezone.now()  # type: ignore
+        last_fetch.views = 0  # type: ignore
+        if changed is not None:
+            rate = last_fetch.change_rate  # type: ignore
+            smoothing = app_settings.get_for("TTL_SMOOTHING", self.app, content_type)
+            last_fetch.change_rate = (  # type: ignore
+                float(changed)
+                if rate is None
+                else smoothing * float(changed) + (1 - smoothing) * rate
+            )
+        if http_validators:
+            last_fetch.http_validators = http_validators  # type: ignore
         last_fetch.full_clean()  # type: ignore
         last_fetch.save()  # type: ignore
+        transaction.on_commit(
+            partial(
+                self.set_fresh_in_cache,
+                content_type,
+                channel,
+                channel_object,
+                last_fetch,  # type: ignore
+            ),
+            using=router.db_for_write(self.fetch_history_model),
+        )
         return last_fetch  # type: ignore
 
     def get_last_fetch(
@@ -317,3 +1000,23 @@ class Proxy(metaclass=ProxyMeta):
             return qs.latest()
         except self.fetch_history_model.DoesNotExist:
             return None
+
+    def get_last_fetches(
+        self, content_type: str, channel: Optional[str], channel_objects: List[str]
+    ) -> Dict[str, FetchHistoryBase]:
+        """
+        Same as `get_last_fetch` for many channel objects of a channel but with only one query.
+        Channel objects never fetched are missing from the returned dict.
+        """
+        qs = self.fetch_history_model.objects.filter(
+            app=self.app, channel_object__in=channel_objects
+        )
+        if content_type:
+            qs = qs.filter(content_type=content_type)
+        if channel:
+            qs = qs.filter(channel=channel)
+        last_fetches = {}
+        # the latest fetch of each channel object comes last
+        for last_fetch in qs.order_by("last_fetch_dt", "pk"):
+            last_fetches[last_fetch.channel_object] = last_fetch
+        return last_fetches
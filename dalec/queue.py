@@ -0,0 +1,243 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Tuple, Type
+    from dalec.models import RefreshJobBase
+
+# Standard libs
+from contextlib import nullcontext
+from datetime import timedelta
+import hashlib
+import json
+
+# Django imports
+from django.apps import apps
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# DALEC imports
+from dalec import settings as app_settings
+from dalec.models import get_content_model
+from dalec.proxy import ProxyPool
+from dalec.proxy import RefreshManyError
+
+__all__ = [
+    "get_refresh_job_model",
+    "get_key",
+    "enqueue",
+    "enqueue_many",
+    "enqueue_prioritized",
+    "claim_jobs",
+    "process_jobs",
+    "process_job",
+]
+
+
+def get_refresh_job_model() -> Type[RefreshJobBase]:
+    if not app_settings.REFRESH_JOB_MODEL:
+        raise ValueError(
+            (
+                "You must define a {setting} in your settings or "
+                "use the default one by adding dalec_prime to your INSTALLED_APPS."
+            ).format(setting="DALEC_REFRESH_JOB_MODEL")
+        )
+    return apps.get_model(app_settings.REFRESH_JOB_MODEL)
+
+
+def get_key(
+    app: str,
+    content_type: Optional[str] = None,
+    channel: Optional[str] = None,
+    channel_object: Optional[str] = None,
+) -> str:
+    """
+    Return the key used to deduplicate refresh jobs
+    """
+    temp_key = json.dumps([app, content_type, channel, channel_object])
+    return hashlib.md5(temp_key.encode("utf-8")).hexdigest()
+
+
+def enqueue(
+    app: str,
+    content_type: Optional[str] = None,
+    channel: Optional[str] = None,
+    channel_object: Optional[str] = None,
+) -> None:
+    """
+    Ask workers to refresh contents of this app + content_type [+ channel [+ channel object]].
+    Nothing is done if this refresh is already waiting for a worker.
+    """
+    enqueue_many([(app, content_type, channel, channel_object)])
+
+
+def enqueue_many(
+    keys: Iterable[Tuple[str, Optional[str], Optional[str], Optional[str]]], priority: int = 0
+) -> None:
+    """
+    Same as `enqueue` but for many (app, content_type, channel, channel_object) at once.
+    Jobs with the highest priority are claimed first by workers.
+    """
+    enqueue_prioritized((key, priority) for key in keys)
+
+
+def enqueue_prioritized(
+    keys: Iterable[Tuple[Tuple[str, Optional[str], Optional[str], Optional[str]], int]],
+    force: bool = False,
+) -> None:
+    """
+    Same as `enqueue_many` but with a priority by (app, content_type, channel, channel_object).
+    Jobs already waiting for a worker with a lower priority get the new one.
+    If `force` is True, contents are refreshed even if their TTL did not expire yet (eg. to
+    refresh them ahead of expiry), including by jobs which were already waiting.
+    """
+    model = get_refresh_job_model()
+    jobs = [
+        model(
+            key=get_key(app, content_type, channel, channel_object),
+            app=app,
+            content_type=content_type,
+            channel=channel,
+            channel_object=channel_object,
+            priority=priority,
+            force=force,
+        )
+        for (app, content_type, channel, channel_object), priority in keys
+    ]
+    model.objects.bulk_create(jobs, ignore_conflicts=True)
+    if force:
+        model.objects.filter(
+            key__in=[job.key for job in jobs], claimed_dt__isnull=True, force=False
+        ).update(force=True)
+    keys_by_priority: Dict[int, List[str]] = {}
+    for job in jobs:
+        if job.priority:
+            keys_by_priority.setdefault(job.priority, []).append(job.key)
+    for priority, job_keys in keys_by_priority.items():
+        model.objects.filter(
+            key__in=job_keys, claimed_dt__isnull=True, priority__lt=priority
+        ).update(priority=priority)
+
+
+def claim_jobs(batch_size: int = 10) -> List[RefreshJobBase]:
+    """
+    Claim at most `batch_size` jobs for the current worker and return them.
+    Jobs claimed by a worker for more than DALEC_WORKER_CLAIM_TIMEOUT seconds are considered
+    as abandoned (eg. the worker has been killed) and can be claimed again.
+    """
+    model = get_refresh_job_model()
+    using = router.db_for_write(model)
+    now = timezone.now()
+    expired = now - timedelta(seconds=app_settings.WORKER_CLAIM_TIMEOUT)
+    claimable = model.objects.using(using).filter(
+        Q(claimed_dt__isnull=True) | Q(claimed_dt__lt=expired)
+    )
+    if connections[using].features.has_select_for_update_skip_locked:
+        # jobs locked by other workers are just ignored: they are not waiting for each other
+        with transaction.atomic(using=using):
+            jobs = list(claimable.select_for_update(skip_locked=True)[:batch_size])
+            model.objects.using(using).filter(pk__in=[job.pk for job in jobs]).update(
+                claimed_dt=now
+            )
+    else:
+        # no row lock (eg. sqlite): a job is claimed only if no other worker claimed it
+        # between our select and our update
+        jobs = []
+        for job in claimable[:batch_size]:
+            claimed = (
+                model.objects.using(using)
+                .filter(pk=job.pk, claimed_dt=job.claimed_dt)
+                .update(claimed_dt=now)
+            )
+            if claimed:
+                jobs.append(job)
+    for job in jobs:
+        job.claimed_dt = now
+    return jobs
+
+
+def process_jobs(jobs: List[RefreshJobBase], batch_commit: bool = False) -> List[RefreshJobBase]:
+    """
+    Refresh contents for claimed jobs and delete them. Jobs of the same app, content type and
+    channel are refreshed together (see `Proxy.refresh_many`).
+    If a refresh fails, its jobs stay claimed to be retried by a worker after
+    DALEC_WORKER_CLAIM_TIMEOUT seconds, unless they already failed DALEC_WORKER_MAX_ATTEMPTS
+    times.
+    If `batch_commit` is True, all refreshes are written with only one commit by database
+    (contents of apps can be stored in models of other databases, see DALEC_CONTENT_MODEL; a
+    failed refresh is still rolled back alone) but transactions stay open while contents are
+    fetched.
+    Return the failed jobs.
+    """
+    if batch_commit:
+        jobs_by_db: Dict[str, List[RefreshJobBase]] = {}
+        for job in jobs:
+            using = router.db_for_write(get_content_model(job.app))
+            jobs_by_db.setdefault(using, []).append(job)
+        failed = []
+        for using, db_jobs in jobs_by_db.items():
+            with transaction.atomic(using=using):
+                failed += _process_jobs(db_jobs, batch_commit=True)
+        return failed
+    return _process_jobs(jobs)
+
+
+def _process_jobs(jobs: List[RefreshJobBase], batch_commit: bool = False) -> List[RefreshJobBase]:
+    groups: Dict[tuple, List[RefreshJobBase]] = {}
+    for job in jobs:
+        group_key = (
+            job.app,
+            job.content_type,
+            job.channel,
+            job.channel_object is None,
+            job.force,
+        )
+        groups.setdefault(group_key, []).append(job)
+    failed = []
+    for (app, content_type, channel, no_channel_object, force), group in groups.items():
+        errors: Dict[Optional[str], Exception] = {}
+        try:
+            proxy = ProxyPool.get(app)
+            # savepoint if many refreshes are committed at once
+            with proxy.atomic() if batch_commit else nullcontext():
+                if no_channel_object:
+                    proxy.refresh(content_type, channel, force=force)  # type: ignore
+                else:
+                    try:
+                        proxy.refresh_many(
+                            content_type,
+                            channel,  # type: ignore
+                            [job.channel_object for job in group],  # type: ignore
+                            force=force,
+                        )
+                    except RefreshManyError as e:
+                        # other channel objects are stored: only failed ones are retried
+                        errors.update(e.errors)
+        except Exception as e:
+            errors = {job.channel_object: e for job in group}
+        group_failed = [job for job in group if job.channel_object in errors]
+        for job in group_failed:
+            job.attempts += 1
+            job.last_error = repr(errors[job.channel_object])
+            if job.attempts >= app_settings.WORKER_MAX_ATTEMPTS:
+                job.delete()
+            else:
+                job.save(update_fields=["attempts", "last_error"])
+        failed += group_failed
+        get_refresh_job_model().objects.filter(
+            pk__in=[job.pk for job in group if job.channel_object not in errors]
+        ).delete()
+    return failed
+
+
+def process_job(job: RefreshJobBase) -> bool:
+    """
+    Same as `process_jobs` for only one job. Return True if the refresh succeeded.
+    """
+    return not process_jobs([job])
@@ -0,0 +1,221 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, List, Optional, Tuple
+    from django.db.models.query import QuerySet
+    from django.http import HttpRequest
+
+# Standard libs
+from functools import lru_cache
+
+# Django imports
+from django.core.paginator import Page
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.loader import select_template
+from django.urls import get_script_prefix
+from django.utils.functional import SimpleLazyObject
+
+# DALEC imports
+from dalec.cache import get_object_list
+from dalec.pagination import get_next_cursor
+from dalec.popularity import record_views
+from dalec.timing import phase
+from dalec.views import FetchContentView
+
+__all__ = ["ListRenderer", "get_renderer", "render"]
+
+
+class ListRenderer:
+    """
+    Render the list of contents for a specific set of dalec's arguments without going through
+    the whole `FetchContentView` machinery at each rendering.
+
+    Everything which does not depend on the contents nor on the request (url, id, templates
+    names, queryset filters…) is computed only once, from a `FetchContentView`, when the
+    renderer is built. Templates are resolved at each rendering (cheap with the cached template
+    loader) to get edited templates in DEBUG mode. Output is the same as the one of the view's
+    first page: pagination context (`paginator`, `page_obj`, `is_paginated`) is the same too
+    but contents are only counted if the template uses it.
+    """
+
+    def __init__(
+        self,
+        app: str,
+        content_type: str,
+        channel: Optional[str] = None,
+        channel_objects: Optional[Tuple[str, ...]] = None,
+        template: Optional[str] = None,
+        ordered_by: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        view = FetchContentView(_dalec_template=template)
+        view.setup(
+            None,  # type: ignore
+            app=app,
+            content_type=content_type,
+            channel=channel,
+            channel_objects=list(channel_objects) if channel_objects else None,
+            page=1,
+            ordered_by=ordered_by,
+            fields=list(fields) if fields else None,
+        )
+        self.view = view
+        self.queryset = view.get_queryset()
+        self.object_list_key = view.get_object_list_key(self.queryset)
+        self.paginate_by = view.get_paginate_by(self.queryset)
+        self.context_object_name = view.get_context_object_name(self.queryset)
+        self.template_names = view.get_template_names()
+        self.context = {
+            # same keys as the context of the view (see `ListView.get_context_data`)
+            "view": view,
+            **view.get_dalec_context(),
+        }
+
+    def get_queryset(self) -> QuerySet:
+        """
+        Return a fresh copy of the queryset, limited to the first page of contents
+        """
+        qs = self.queryset.all()
+        if self.paginate_by:
+            qs = qs[: self.paginate_by]
+        return qs
+
+    def get_object_list(self) -> List[Any]:
+        app, content_type, channel, channel_objects = self.object_list_key[:4]
+        return get_object_list(
+            self.object_list_key, app, content_type, channel, channel_objects, self.get_queryset()
+        )
+
+    def get_pagination_context(self, object_list: List[Any]) -> dict:
+        """
+        Return the pagination context of the first page, the same as the view's one (see
+        `FetchContentView.paginate_queryset`). Contents are counted lazily, only if the template
+        uses `paginator.count`, `is_paginated`, `page_obj.has_next`…
+        """
+        if not self.paginate_by:
+            return {"paginator": None, "page_obj": None, "is_paginated": False}
+        if self.context["load_more"]:
+            return {
+                "paginator": None,
+                "page_obj": None,
+                "is_paginated": len(object_list) == self.paginate_by,
+            }
+        paginator = self.view.get_paginator(
+            self.queryset.all(),
+            self.paginate_by,
+            orphans=self.view.get_paginate_orphans(),
+            allow_empty_first_page=self.view.get_allow_empty(),
+        )
+        page_obj = Page(object_list, 1, paginator)
+        return {
+            "paginator": paginator,
+            "page_obj": page_obj,
+            "is_paginated": SimpleLazyObject(page_obj.has_other_pages),
+        }
+
+    def get_context_data(
+        self, object_list: List[Any], request: Optional[HttpRequest] = None
+    ) -> dict:
+        context = {
+            **self.context,
+            **self.get_pagination_context(object_list),
+            "object_list": object_list,
+            "is_fetch": request and request.headers.get("content-type") == "application/json",
+        }
+        if self.context["load_more"]:
+            context["next_cursor"] = get_next_cursor(
+                object_list, self.paginate_by, self.context["ordered_by"]
+            )
+        if self.context_object_name:
+            context[self.context_object_name] = object_list
+        return context
+
+    def render(self, request: Optional[HttpRequest] = None) -> str:
+        with phase("list"):
+            object_list = self.get_object_list()
+        context = self.get_context_data(object_list, request)
+        with phase("template"):
+            template = select_template(self.template_names)
+        with phase("render"):
+            return template.render(context)
+
+
+@lru_cache(maxsize=512)
+def _get_renderer(
+    app: str,
+    content_type: str,
+    channel: Optional[str],
+    channel_objects: Optional[Tuple[str, ...]],
+    template: Optional[str],
+    ordered_by: Optional[str],
+    fields: Optional[Tuple[str, ...]],
+    script_prefix: str,
+) -> ListRenderer:
+    return ListRenderer(app, content_type, channel, channel_objects, template, ordered_by, fields)
+
+
+def get_renderer_key(
+    app: str,
+    content_type: str,
+    channel: Optional[str] = None,
+    channel_objects: Optional[List[str]] = None,
+    template: Optional[str] = None,
+    ordered_by: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> tuple:
+    """
+    Return a normalized and hashable key for those dalec's arguments
+    """
+    return (
+        app,
+        content_type,
+        channel or None,
+        tuple(channel_objects) if channel_objects else None,
+        template or None,
+        ordered_by or None,
+        tuple(fields) if fields else None,
+        # urls are reversed when the renderer is built and depend on the script prefix
+        get_script_prefix(),
+    )
+
+
+def get_renderer(*args: Any, **kwargs: Any) -> ListRenderer:
+    """
+    Return the (cached) renderer for those dalec's arguments (see `get_renderer_key`)
+    """
+    return _get_renderer(*get_renderer_key(*args, **kwargs))
+
+
+def render(request: Optional[HttpRequest], *args: Any, **kwargs: Any) -> str:
+    """
+    Render the list of contents for those dalec's arguments (see `get_renderer_key`).
+    The same list is rendered only once by request: next calls with the same arguments
+    (eg. a dalec used in a sidebar and in the main column, or inside an included template
+    in a loop) reuse the first result.
+    Displays are counted (see `dalec.popularity`) once by request.
+    """
+    key = get_renderer_key(*args, **kwargs)
+    if request is None:
+        record_views(*key[:4])
+        return _get_renderer(*key).render(request)
+    rendered = getattr(request, "_dalec_rendered", None)
+    if rendered is None:
+        rendered = request._dalec_rendered = {}  # type: ignore
+    if key not in rendered:
+        record_views(*key[:4])
+        rendered[key] = _get_renderer(*key).render(request)
+    return rendered[key]
+
+
+@receiver(setting_changed)
+def clear_renderers(**kwargs: Any) -> None:
+    """
+    Renderers depend on settings (templates, urls, dalec's settings…): forget them when
+    a setting changes (mainly in tests)
+    """
+    _get_renderer.cache_clear()
@@ -0,0 +1,79 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Optional, Type
+    from django.db.models import Model
+
+# Standard libs
+from contextvars import ContextVar
+import random
+
+# Django imports
+from django.core.signals import request_started
+from django.dispatch import receiver
+
+# DALEC imports
+from dalec import settings as app_settings
+from dalec.models import ContentBase
+from dalec.models import FetchHistoryBase
+from dalec.models import PayloadBase
+
+__all__ = ["ReplicaRouter", "pin_primary", "is_pinned"]
+
+# True once the current request (or worker) wrote contents: it must read its own writes
+_pinned: ContextVar[bool] = ContextVar("dalec_pinned", default=False)
+
+
+def pin_primary() -> None:
+    """
+    Send next reads of contents to the primary DB until the end of the current request
+    """
+    _pinned.set(True)
+
+
+def is_pinned() -> bool:
+    return _pinned.get()
+
+
+@receiver(request_started)
+def unpin_primary(**kwargs: Any) -> None:
+    _pinned.set(False)
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads of contents, fetch histories and payloads (lists displayed by
+    the view and the templatetag, TTL checks…) to one of DALEC_REPLICAS and their writes to
+    DALEC_PRIMARY.
+    Once a request refreshed contents (see `Proxy.atomic`), all its reads go to the primary: it
+    never displays contents of a replica which is not up to date yet.
+    Other models are left to next routers.
+    """
+
+    models = (ContentBase, FetchHistoryBase, PayloadBase)
+
+    def is_routed(self, model: Type[Model]) -> bool:
+        return issubclass(model, self.models)
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        if not self.is_routed(model):
+            return None
+        if not app_settings.REPLICAS or is_pinned():
+            return app_settings.PRIMARY
+        return random.choice(app_settings.REPLICAS)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        if not self.is_routed(model):
+            return None
+        return app_settings.PRIMARY
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        # replicas have the same data than the primary
+        dbs = {app_settings.PRIMARY, *app_settings.REPLICAS}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
@@ -56,7 +56,23 @@ def get_for(
 CSS_FRAMEWORK = get_setting("CSS_FRAMEWORK", None)
 NB_CONTENTS_KEPT = get_setting("NB_CONTENTS_KEPT", 10)
 AJAX_REFRESH = get_setting("AJAX_REFRESH", True)
+LOAD_MORE = get_setting("LOAD_MORE", False)
 TTL = get_setting("TTL", 900)
+TTL_MIN = get_setting("TTL_MIN", None)
+TTL_MAX = get_setting("TTL_MAX", None)
+TTL_SMOOTHING = get_setting("TTL_SMOOTHING", 0.3)
+TTL_GATE = get_setting("TTL_GATE", False)
+LIST_FIELDS = get_setting("LIST_FIELDS", None)
+FIELDS = get_setting("FIELDS", None)
+TYPED_DATES = get_setting("TYPED_DATES", False)
+RATE_LIMIT = get_setting("RATE_LIMIT", None)
+CACHE = get_setting("CACHE", "default")
+PRIMARY = get_setting("PRIMARY", "default")
+REPLICAS = get_setting("REPLICAS", [])
+TIMING_LOG_RATE = get_setting("TIMING_LOG_RATE", 0)
+LIST_CACHE_ENTRIES = get_setting("LIST_CACHE_ENTRIES", 0)
+LIST_CACHE_BYTES = get_setting("LIST_CACHE_BYTES", 16 * 1024 * 1024)
+LIST_CACHE_TTL = get_setting("LIST_CACHE_TTL", 60)
 
 CONTENT_MODEL = get_setting("CONTENT_MODEL")
 if not CONTENT_MODEL:
@@ -81,3 +97,16 @@ if not FETCH_HISTORY_MODEL:
         )
     else:
         FETCH_HISTORY_MODEL = "dalec_prime.FetchHistory"
+
+PAYLOAD_MODEL = get_setting("PAYLOAD_MODEL", None)
+
+REFRESH_QUEUE = get_setting("REFRESH_QUEUE", False)
+WORKER_CLAIM_TIMEOUT = get_setting("WORKER_CLAIM_TIMEOUT", 600)
+WORKER_MAX_ATTEMPTS = get_setting("WORKER_MAX_ATTEMPTS", 3)
+COUNT_VIEWS = get_setting("COUNT_VIEWS", False)
+VIEWS_FLUSH_INTERVAL = get_setting("VIEWS_FLUSH_INTERVAL", 10)
+HOT_VIEWS = get_setting("HOT_VIEWS", 10)
+REFRESH_AHEAD = get_setting("REFRESH_AHEAD", 0.8)
+REFRESH_JOB_MODEL = get_setting("REFRESH_JOB_MODEL")
+if not REFRESH_JOB_MODEL and "dalec_prime" in settings.INSTALLED_APPS:
+    REFRESH_JOB_MODEL = "dalec_prime.RefreshJob"
@@ -0,0 +1,124 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Dict, Iterable, List, Optional, Type
+    from django.db.models import Model
+
+# Standard libs
+from datetime import datetime
+from datetime import time
+import json
+
+# Django imports
+from django.apps import apps
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+
+# DALEC imports
+from dalec import settings as app_settings
+from dalec.models import get_content_model
+from dalec.models import get_payload_model
+from dalec.proxy import ProxyPool
+
+__all__ = ["SnapshotEncoder", "get_snapshot_models", "dump", "load"]
+
+
+class SnapshotEncoder(DjangoJSONEncoder):
+    """
+    Same as `DjangoJSONEncoder` but keeps microseconds: loaded contents must have exactly the
+    same dates to not be seen as updated by the next refresh.
+    """
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_snapshot_models() -> List[Type[Model]]:
+    """
+    Return models stored in snapshots: contents (of each app, see DALEC_CONTENT_MODEL), shared
+    payloads and fetch histories
+    """
+    snapshot_models = [get_content_model()]
+    for app in ProxyPool.get_available_apps():
+        content_model = get_content_model(app)
+        if content_model not in snapshot_models:
+            snapshot_models.append(content_model)
+    payload_model = get_payload_model()
+    if payload_model is not None:
+        snapshot_models.append(payload_model)
+    snapshot_models.append(apps.get_model(app_settings.FETCH_HISTORY_MODEL))
+    return snapshot_models
+
+
+def dump(
+    stream: IO[str], dalec_apps: Optional[Iterable[str]] = None, chunk_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Write contents, payloads and fetch histories [of those apps] into the stream, one JSON
+    object by line, and return the number of objects written by model.
+    Rows are read by chunks: memory does not depend on the number of contents.
+    Primary keys are not written and related django objects are written with their natural
+    keys, so a snapshot can be loaded into any database.
+    """
+    counts = {}
+    for model in get_snapshot_models():
+        qs = model._default_manager.order_by("pk")
+        if dalec_apps:
+            qs = qs.filter(app__in=dalec_apps)
+        count = 0
+        chunk = []
+        for obj in qs.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                count += _dump_chunk(stream, chunk)
+                chunk = []
+        count += _dump_chunk(stream, chunk)
+        counts[model._meta.label] = count
+    return counts
+
+
+def _dump_chunk(stream: IO[str], chunk: List[Model]) -> int:
+    for data in serializers.serialize("python", chunk, use_natural_foreign_keys=True):
+        data.pop("pk", None)
+        stream.write(json.dumps(data, cls=SnapshotEncoder, separators=(",", ":")) + "\n")
+    return len(chunk)
+
+
+def load(stream: Iterable[str], chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Create objects of a snapshot (see `dump`) with bulk inserts of `chunk_size` objects and
+    return the number of objects read by model.
+    Snapshots are meant to be loaded into an empty database: existing contents and fetch
+    histories are kept and would be duplicated.
+    Fetch histories are loaded as if contents have been fetched during the load: they will be
+    refreshed when their TTL expires from now.
+    """
+    counts: Dict[str, int] = {}
+    chunks: Dict[Type[Model], List[Model]] = {}
+    for line in stream:
+        if not line.strip():
+            continue
+        for deserialized in serializers.deserialize("python", [json.loads(line)]):
+            obj = deserialized.object
+            model = type(obj)
+            chunk = chunks.setdefault(model, [])
+            chunk.append(obj)
+            counts[model._meta.label] = counts.get(model._meta.label, 0) + 1
+            if len(chunk) >= chunk_size:
+                _load_chunk(model, chunk)
+                chunks[model] = []
+    for model, chunk in chunks.items():
+        _load_chunk(model, chunk)
+    return counts
+
+
+def _load_chunk(model: Type[Model], chunk: List[Model]) -> None:
+    if chunk:
+        # ignore payloads which already exist
+        model._default_manager.bulk_create(chunk, ignore_conflicts=True)
@@ -36,3 +36,50 @@ export function fetch_content(container) {
     });
   });
 }
+
+export function load_more(container, button) {
+  const [orderedBy, url] = [container.dataset.orderedBy, container.dataset.url];
+  let channelObjects = container.dataset.channelObjects;
+
+  if (channelObjects !== undefined) {
+    channelObjects = JSON.parse(channelObjects);
+  }
+  button.disabled = true;
+  container.classList.add("dalec-loading");
+  container.classList.remove("dalec-loading-error");
+  fetch(url, {
+    method: "POST",
+    headers: {
+      Accept: "text/html",
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      channelObjects: channelObjects,
+      orderedBy: orderedBy,
+      cursor: button.dataset.cursor,
+    }),
+  }).then(function (response) {
+    container.classList.remove("dalec-loading");
+    if (!response.ok) {
+      button.disabled = false;
+      container.classList.add("dalec-loading-error");
+      console.error(`HTTP error ${response.status} while fetching ${url}`);
+      return;
+    }
+    response.text().then(function (html) {
+      // next contents come with the button to load the following ones, if any
+      button.insertAdjacentHTML("beforebegin", html);
+      button.remove();
+    });
+  });
+}
+
+export function bind_load_more(container) {
+  container.addEventListener("click", function (event) {
+    const button = event.target.closest(".dalec-load-more");
+    if (button !== null && container.contains(button)) {
+      event.preventDefault();
+      load_more(container, button);
+    }
+  });
+}
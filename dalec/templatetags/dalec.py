@@ -2,16 +2,16 @@
 from __future__ import annotations
 
 import datetime
+from functools import lru_cache
 import json
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Optional, Union
 
 from django.template import Library
-from django.template.loader import select_template
 
-from ..views import FetchContentView
+from ..renderers import render
 
 register = Library()
 
@@ -26,6 +26,7 @@ def dalec(
     channel_objects: Optional[str] = None,
     template: Optional[str] = None,
     ordered_by: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> str:
     """
     Show last N contents for a specific app+content_type (and optionnaly channel+channel_object)
@@ -51,38 +52,85 @@ def dalec(
     Retrieves recent gitlab issues for multiple projects and order them by descending
     issue internal ID (default is `last_update_dt`):
     {% dalec "gitlab" "issue" channel="project" channel_object='42' ordered_by="-iid" %}
+
+    Retrieves recent gitlab issues for a project but only load keys used by the item template:
+    {% dalec "gitlab" "issue" channel="project" channel_object='42' fields='["title", "url"]' %}
     """
     if channel_object and channel_objects:
         raise ValueError("You can not use channel_object AND channel_objects at the same time")
-    dalec_view = FetchContentView(_dalec_template=template)
     if channel_objects:
         list_channel_objects = json.loads(channel_objects)
     elif channel_object:
         list_channel_objects = [channel_object]
     else:
         list_channel_objects = None
-    dalec_view.setup(
+    return render(
         context.get("request", None),
-        app=app,
-        content_type=content_type,
+        app,
+        content_type,
         channel=channel,
         channel_objects=list_channel_objects,
-        page=1,
+        template=template,
         ordered_by=ordered_by,
+        fields=json.loads(fields) if fields else None,
     )
-    dalec_view.object_list = dalec_view.get_queryset()
-    context = dalec_view.get_context_data()
-    template_obj = select_template(dalec_view.get_template_names())
-    return template_obj.render(context)
+
+
+# default formats of `to_datetime` (never modified: it's shared by all rendering threads)
+DATE_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d",
+)
+
+
+def _is_iso_shaped(value: str) -> bool:
+    """
+    Return True if value looks like one of the default formats, so `fromisoformat` can not
+    accept dates refused by them (eg. naive datetimes or other ISO 8601 variants)
+    """
+    if len(value) < 10 or value[4] != "-" or value[7] != "-":
+        return False
+    if len(value) == 10:
+        return True
+    return len(value) > 19 and value[10] == "T" and value[13] == ":" and value[16] == ":"
+
+
+@lru_cache(maxsize=4096)
+def _parse_datetime(value: str, api_date_format: Optional[str] = None) -> datetime.datetime:
+    """
+    Parse dates for `to_datetime`. Results are memoized because the same contents are
+    rendered again and again between two refreshes.
+    """
+    if api_date_format is not None:
+        return datetime.datetime.strptime(value, api_date_format)
+    if _is_iso_shaped(value):
+        try:
+            date = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            # eg. "Z" or "-0700" offsets on Python < 3.11
+            pass
+        else:
+            if date.tzinfo is not None or len(value) == 10:
+                return date
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(value)
 
 
 @register.filter(expects_localtime=True, is_safe=False)
-def to_datetime(value: str, api_date_format: Optional[str] = None) -> datetime.datetime:
+def to_datetime(
+    value: Union[str, datetime.datetime], api_date_format: Optional[str] = None
+) -> datetime.datetime:
     """
     API string to datetime object
 
     Different API retourne date with different format (timezone aware, date, datetime,
     etc). This filter try to guess the most appropriate one and return a datetime object.
+    Datetimes (eg. dates typed at ingest, see DALEC_TYPED_DATES) are returned as is.
 
     Params
     ------
@@ -101,21 +149,12 @@ def to_datetime(value: str, api_date_format: Optional[str] = None) -> datetime.d
     """
     if value in (None, ""):
         raise ValueError("No value for the date conversion")
+    if isinstance(value, datetime.datetime):
+        return value
 
-    if api_date_format is None:
-        for date_format in [
-            "%Y-%m-%dT%H:%M:%S.%f%z",
-            "%Y-%m-%dT%H:%M:%S%z",
-            "%Y-%m-%d",
-        ]:
-            try:
-                return datetime.datetime.strptime(value, date_format)
-            except ValueError:
-                continue
-    else:
-        try:
-            return datetime.datetime.strptime(value, api_date_format)
-        except ValueError:
-            pass
+    try:
+        return _parse_datetime(value, api_date_format)
+    except ValueError:
+        pass
 
     raise ValueError(f"No given format matching {value}. Given: {api_date_format}")
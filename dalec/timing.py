@@ -0,0 +1,147 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Optional
+    from django.http import HttpRequest, HttpResponse
+
+# Standard libs
+from contextlib import ExitStack
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import random
+import time
+
+# Django imports
+from django.db import connections
+from django.template.response import TemplateResponse
+
+# DALEC imports
+from dalec import settings as app_settings
+
+__all__ = ["RequestTimings", "phase", "TimedTemplateResponse", "ServerTimingMiddleware"]
+
+logger = logging.getLogger("dalec.timing")
+
+
+class RequestTimings:
+    """
+    Durations of the phases of a request (TTL checks, fetches, upserts, pruning, templates
+    resolution, rendering…) and number and duration of its DB queries.
+    Phases can be nested: the duration of a phase does not include the ones of its sub phases,
+    so durations of all phases can be added.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.nb_queries = 0
+        self.queries_duration = 0.0
+        # [name, start, duration of sub phases] of phases in progress
+        self._stack: List[list] = []
+
+    def start(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self) -> None:
+        name, start, children = self._stack.pop()
+        duration = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + duration - children
+        if self._stack:
+            self._stack[-1][2] += duration
+
+    def count_query(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: dict
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.nb_queries += 1
+            self.queries_duration += time.perf_counter() - start
+
+    def get_header(self, total: Optional[float] = None) -> str:
+        """
+        Return the value of a `Server-Timing` header (durations in milliseconds)
+        """
+        metrics = [
+            "%s;dur=%.1f" % (name, duration * 1000) for name, duration in self.phases.items()
+        ]
+        metrics.append(
+            'db;dur=%.1f;desc="%d queries"' % (self.queries_duration * 1000, self.nb_queries)
+        )
+        if total is not None:
+            metrics.append("total;dur=%.1f" % (total * 1000))
+        return ", ".join(metrics)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("dalec_timings", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a phase of the current request if it is profiled (see `ServerTimingMiddleware`),
+    else do nothing
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    timings.start(name)
+    try:
+        yield
+    finally:
+        timings.stop()
+
+
+class TimedTemplateResponse(TemplateResponse):
+    """
+    Template response whose rendering, done by Django after the view and the middlewares, is
+    timed as the "render" phase
+    """
+
+    @property
+    def rendered_content(self) -> str:
+        with phase("render"):
+            return super().rendered_content
+
+
+class ServerTimingMiddleware:
+    """
+    Time phases of requests displaying or refreshing dalec's contents and add them, with the
+    number of DB queries, in a `Server-Timing` header (shown by browsers' devtools).
+    A sample of them (see DALEC_TIMING_LOG_RATE) is also logged by the `dalec.timing` logger.
+    Requests which do not use dalec are left unchanged.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.count_query))
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        if not timings.phases:
+            return response
+        header = timings.get_header(time.perf_counter() - start)
+        response["Server-Timing"] = header
+        if random.random() < app_settings.TIMING_LOG_RATE:
+            logger.info(
+                "%s %s %s",
+                request.method,
+                request.get_full_path(),
+                header,
+                extra={"phases": timings.phases, "nb_queries": timings.nb_queries},
+            )
+        return response
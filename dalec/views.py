@@ -7,7 +7,7 @@ import json
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Union, List, Type
+    from typing import Any, Union, List, Type
     from dalec.models import ContentBase
     from django.http import HttpRequest
     from django.db.models.query import QuerySet
@@ -19,6 +19,7 @@ import urllib.parse
 # Django imports
 from django.apps import apps
 from django.http import HttpResponse
+from django.http import Http404
 from django.template.loader import select_template
 from django.urls import reverse
 
@@ -31,20 +32,42 @@ except ImportError:
 # Django imports
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView
 
 # DALEC imports
 from dalec import settings as app_settings
+from dalec.cache import get_object_list
+from dalec.cache import get_object_list_cache
+from dalec.models import ContentQuerySet
+from dalec.models import get_content_model
+from dalec.models import get_payload_model
+from dalec.pagination import decode_cursor
+from dalec.pagination import get_next_cursor
+from dalec.pagination import keyset_queryset
+from dalec.pagination import supports_keyset
 from dalec.proxy import ProxyPool
+from dalec.proxy import RefreshManyError
+from dalec.queue import enqueue_many
+from dalec.timing import TimedTemplateResponse
+from dalec.timing import phase
 
 __all__ = ["FetchContentView"]
 
 
 @method_decorator(csrf_exempt, name="dispatch")
 class FetchContentView(ListView):
+    # rendering is timed (see `dalec.timing`)
+    response_class = TimedTemplateResponse
+    # not derived from the model: it's the same for all apps (see `get_queryset`)
+    context_object_name = "content_list"
+
     @classproperty
     def model(cls) -> Type[ContentBase]:
+        """
+        Default Content model (see `get_queryset` for the one of the displayed app)
+        """
         return apps.get_model(app_settings.CONTENT_MODEL)
 
     @property
@@ -75,6 +98,36 @@ class FetchContentView(ListView):
     def dalec_channel_objects(self, channel_objects: List[str]) -> None:
         self.kwargs["channel_objects"] = channel_objects
 
+    @property
+    def dalec_fields(self) -> Union[List[str], None]:
+        """
+        Keys of `content_data` required to display contents (None means all of them)
+        """
+        fields = self.kwargs.get("fields", None)
+        if fields is None:
+            fields = app_settings.get_for("LIST_FIELDS", self.dalec_app, self.dalec_content_type)
+        return fields
+
+    @property
+    def dalec_cursor(self) -> Union[str, None]:
+        """
+        Cursor of the page to display (see `dalec.pagination`), None for the first page
+        """
+        cursor = self.kwargs.get("cursor", None)
+        if cursor is None and self.request is not None:
+            cursor = self.request.GET.get("cursor", None)
+        return cursor or None
+
+    @property
+    def dalec_load_more(self) -> bool:
+        """
+        True if next pages of contents can be loaded with a cursor (see DALEC_LOAD_MORE)
+        """
+        return bool(
+            app_settings.get_for("LOAD_MORE", self.dalec_app, self.dalec_content_type)
+            and supports_keyset(self.ordered_by)
+        )
+
     @cached_property
     def dalec_template(self) -> Union[str, None]:
         return (
@@ -94,6 +147,7 @@ class FetchContentView(ListView):
             data = json.loads(self.request.body)
             self.dalec_channel_objects = data.get("channelObjects", None)
             self.ordered_by = data.get("orderedBy", None)
+            self.kwargs["cursor"] = data.get("cursor", None)
         return self.get(request, *args, **kwargs)
 
     def get(self, request: HttpRequest, *args: tuple, **kwargs: dict) -> HttpResponse:
@@ -103,6 +157,9 @@ class FetchContentView(ListView):
         """
         if self.kwargs.get("channel_object", None):
             self.dalec_channel_objects = [urllib.parse.unquote(self.kwargs["channel_object"])]
+        if self.dalec_cursor and self.dalec_load_more:
+            # next page: contents have already been refreshed with the first one
+            return super().get(request, *args, **kwargs)
         refreshed = self.refresh_contents()
         if not refreshed:
             # nothing to refresh, our content is already the updated one
@@ -124,7 +181,7 @@ class FetchContentView(ListView):
         Return the queryset filtered by app + contentype and optionaly channel and channel object
         if it's given
         """
-        qs = super().get_queryset(*args, **kwargs)
+        qs = get_content_model(self.dalec_app)._default_manager.all()
         qs = qs.filter(app=self.dalec_app, content_type=self.dalec_content_type)
         if not self.dalec_channel:
             qs = qs.filter(channel__isnull=True)
@@ -135,7 +192,9 @@ class FetchContentView(ListView):
             else:
                 qs = qs.filter(channel_object__isnull=True)
 
-        if self.ordered_by:
+        if self.ordered_by and isinstance(qs, ContentQuerySet):
+            qs = qs.order_by_content(self.ordered_by)
+        elif self.ordered_by:
             order = ""
             if self.ordered_by.startswith("-"):
                 order = "-"
@@ -143,6 +202,14 @@ class FetchContentView(ListView):
             else:
                 ordered_by = self.ordered_by
             qs = qs.order_by(f"{order}content_data__{ordered_by}")
+        if self.dalec_load_more:
+            qs = keyset_queryset(qs, self.ordered_by)
+        # avoid N+1 queries when items' templates display related django's objects
+        qs = qs.prefetch_related("dj_content_obj", "dj_channel_obj")
+        if isinstance(qs, ContentQuerySet) and get_payload_model() is not None:
+            qs = qs.with_payloads(self.dalec_fields)
+        elif self.dalec_fields and isinstance(qs, ContentQuerySet):
+            qs = qs.only_content_fields(self.dalec_fields)
         return qs
 
     def get_template_names(self, template_type: str = "list") -> List:
@@ -185,45 +252,163 @@ class FetchContentView(ListView):
         template = select_template(tpl_names)
         return template.template.name
 
-    def get_context_data(self, **kwargs: dict) -> dict:
-        """Get the context for this view."""
-        context = super().get_context_data(**kwargs)
+    def get_dalec_context(self) -> dict:
+        """
+        Return the part of the context which only depends on the dalec's arguments
+        (app, content_type, channel, channel_objects, template and ordering) and not on
+        the current request nor the contents.
+        """
         url_kwargs = {"app": self.dalec_app, "content_type": self.dalec_content_type}
         if self.dalec_channel:
             url_kwargs["channel"] = self.dalec_channel
-        context.update(
-            {
-                "item_template": self.get_item_template(),
-                "app": self.dalec_app,
-                "content_type": self.dalec_content_type,
-                "channel": self.dalec_channel,
-                "channel_objects": self.dalec_channel_objects,
-                "json_channel_objects": json.dumps(self.dalec_channel_objects),
-                "ordered_by": self.ordered_by,
-                "url": reverse("dalec_fetch_content", kwargs=url_kwargs),
-                "ajax_refresh": app_settings.AJAX_REFRESH,
-                "is_fetch": self.request
-                and self.request.headers.get("content-type") == "application/json",
-            }
-        )
+        with phase("template"):
+            item_template = self.get_item_template()
+        context = {
+            "item_template": item_template,
+            "app": self.dalec_app,
+            "content_type": self.dalec_content_type,
+            "channel": self.dalec_channel,
+            "channel_objects": self.dalec_channel_objects,
+            "json_channel_objects": json.dumps(self.dalec_channel_objects),
+            "ordered_by": self.ordered_by,
+            "url": reverse("dalec_fetch_content", kwargs=url_kwargs),
+            "ajax_refresh": app_settings.AJAX_REFRESH,
+            "load_more": self.dalec_load_more,
+        }
         temp_id = "{app}-{content_type}-{channel}-{json_channel_objects}".format(**context)
         context["id"] = hashlib.md5(temp_id.encode("utf-8")).hexdigest()
         if self.dalec_template:
             context["url"] += "?template=%s" % self.dalec_template
         return context
 
+    def get_object_list_key(self, queryset: QuerySet) -> tuple:
+        """
+        Return the key of the first page of contents in the cache of lists of contents
+        (see `dalec.cache`)
+        """
+        return (
+            self.dalec_app,
+            self.dalec_content_type,
+            self.dalec_channel or None,
+            tuple(self.dalec_channel_objects) if self.dalec_channel_objects else None,
+            self.ordered_by or None,
+            tuple(self.dalec_fields) if self.dalec_fields else None,
+            self.get_paginate_by(queryset),
+        )
+
+    def get_context_data(self, **kwargs: dict) -> dict:
+        """Get the context for this view."""
+        paginate_by = self.get_paginate_by(self.object_list)
+        with phase("list"):
+            cached = "object_list" not in kwargs and get_object_list_cache() is not None
+            if cached and paginate_by and self.dalec_load_more and not self.dalec_cursor:
+                # pagination by keyset does not depend on the whole queryset: the first page
+                # can come from the cache as is
+                kwargs["object_list"] = get_object_list(  # type: ignore
+                    self.get_object_list_key(self.object_list),
+                    self.dalec_app,
+                    self.dalec_content_type,
+                    self.dalec_channel,
+                    self.dalec_channel_objects,
+                    self.object_list[:paginate_by],
+                )
+                cached = False
+            context = super().get_context_data(**kwargs)
+            page_obj = context["page_obj"]
+            if cached and page_obj is not None and page_obj.number == 1:
+                # only the first page is displayed by dalec: its contents can come from the
+                # cache, the pagination is still the one of the whole queryset
+                page_obj.object_list = get_object_list(
+                    self.get_object_list_key(self.object_list),
+                    self.dalec_app,
+                    self.dalec_content_type,
+                    self.dalec_channel,
+                    self.dalec_channel_objects,
+                    page_obj.object_list,
+                )
+                context["object_list"] = page_obj.object_list
+                context_object_name = self.get_context_object_name(self.object_list)
+                if context_object_name is not None:
+                    context[context_object_name] = page_obj.object_list
+        context.update(self.get_dalec_context())
+        context["is_fetch"] = (
+            self.request and self.request.headers.get("content-type") == "application/json"
+        )
+        if self.dalec_load_more:
+            context["next_cursor"] = get_next_cursor(
+                context["object_list"], paginate_by, self.ordered_by
+            )
+        return context
+
+    def render_to_response(self, context: dict, **response_kwargs: Any) -> HttpResponse:
+        """
+        Same as `ListView.render_to_response` but the template is resolved now, to time it
+        (see `dalec.timing`)
+        """
+        response_kwargs.setdefault("content_type", self.content_type)
+        with phase("template"):
+            template = select_template(self.get_template_names(), using=self.template_engine)
+        return self.response_class(
+            request=self.request,
+            template=template,
+            context=context,
+            using=self.template_engine,
+            **response_kwargs,
+        )
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> tuple:
+        """
+        Paginate by keyset if next pages can be loaded (see DALEC_LOAD_MORE): no COUNT query and
+        each page costs the same, whatever its depth. Pages numbers are not available.
+        """
+        if not self.dalec_load_more:
+            return super().paginate_queryset(queryset, page_size)
+        if self.dalec_cursor and not isinstance(queryset, list):
+            cursor = decode_cursor(self.dalec_cursor)
+            try:
+                if cursor is None:
+                    raise ValueError("Invalid cursor")
+                queryset = keyset_queryset(queryset, self.ordered_by, cursor)
+            except (ValueError, TypeError):
+                raise Http404(_("Invalid cursor"))
+        object_list = list(queryset[:page_size])
+        return (None, None, object_list, len(object_list) == page_size)
+
     def refresh_contents(self) -> bool:
         """
         Asks to the proxy to refresh content and returns True if something has been or False if
         there are no new created/updated/deleted content (in this case this view will return a 204)
         """
         proxy = ProxyPool.get(self.dalec_app)
+        if app_settings.get_for("REFRESH_QUEUE", self.dalec_app, self.dalec_content_type):
+            # refreshes are done by workers: contents will be updated on next display
+            expired: List[Union[str, None]]
+            if self.dalec_channel_objects:
+                expired = list(
+                    proxy.get_expired(
+                        self.dalec_content_type, self.dalec_channel, self.dalec_channel_objects
+                    )
+                )
+            elif proxy.needs_refresh(self.dalec_content_type, self.dalec_channel):
+                expired = [None]
+            else:
+                expired = []
+            enqueue_many(
+                (self.dalec_app, self.dalec_content_type, self.dalec_channel, channel_object)
+                for channel_object in expired
+            )
+            return False
         something_changed = False
         if self.dalec_channel_objects:
-            for channel_object in self.dalec_channel_objects:
-                created, updated, deleted = proxy.refresh(
-                    self.dalec_content_type, self.dalec_channel, channel_object
+            try:
+                results = proxy.refresh_many(
+                    self.dalec_content_type, self.dalec_channel, self.dalec_channel_objects
                 )
+            except RefreshManyError as e:
+                # other channel objects are stored but the error of the first failed one is
+                # raised as if it was refreshed alone
+                raise next(iter(e.errors.values())) from e
+            for created, updated, deleted in results.values():
                 something_changed = something_changed or bool(created or updated or deleted)
         else:
             created, updated, deleted = proxy.refresh(self.dalec_content_type, self.dalec_channel)
@@ -18,7 +18,6 @@ from django.utils.timezone import now
 
 # DALEC imports
 from dalec.proxy import Proxy
-import requests
 
 __all__ = ["ExampleProxy"]
 
@@ -101,14 +100,13 @@ class ExampleProxy(Proxy):
             if not channel_object:
                 raise ValueError("Invalid channel object")
             params["where"] = 'libelle_academie ="%s"' % channel_object
-        resp = requests.get(
+        resp = self.http_get(
             (
                 "https://data.education.gouv.fr/api/v2/"
                 "catalog/datasets/fr-en-annuaire-education/records"
             ),
             params=params,
         )
-        resp.raise_for_status()
         contents = {}
         records = resp.json().get("records", [])
         for record in records:
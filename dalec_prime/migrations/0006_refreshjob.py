@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0001_squashed_0005_auto_20231017_1208"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefreshJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("key", models.CharField(max_length=32, unique=True, verbose_name="key")),
+                (
+                    "creation_dt",
+                    models.DateTimeField(auto_now_add=True, verbose_name="creation datetime"),
+                ),
+                (
+                    "claimed_dt",
+                    models.DateTimeField(blank=True, null=True, verbose_name="claimed datetime"),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="attempts")),
+                (
+                    "last_error",
+                    models.TextField(blank=True, default="", verbose_name="last error"),
+                ),
+                ("app", models.CharField(max_length=50, verbose_name="dalec app")),
+                (
+                    "content_type",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="content type"
+                    ),
+                ),
+                (
+                    "channel",
+                    models.CharField(blank=True, max_length=50, null=True, verbose_name="channel"),
+                ),
+                (
+                    "channel_object",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, verbose_name="channel app object id"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Refresh job",
+                "verbose_name_plural": "Refresh jobs",
+                "ordering": ("creation_dt",),
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:53
+
+from django.db import migrations
+
+try:
+    # Django imports
+    from django.db.models import JSONField  # type: ignore
+except ImportError:
+    from django_jsonfield_backport.models import JSONField  # type: ignore
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0006_refreshjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fetchhistory",
+            name="http_validators",
+            field=JSONField(
+                blank=True,
+                default=dict,
+                help_text="Validators (url, ETag, Last-Modified, content hash) of the last response of the external source, used to avoid downloading / parsing the same contents again.",
+                verbose_name="HTTP validators",
+            ),
+        ),
+    ]
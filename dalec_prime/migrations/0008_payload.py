@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+try:
+    # Django imports
+    from django.db.models import JSONField  # type: ignore
+except ImportError:
+    from django_jsonfield_backport.models import JSONField  # type: ignore
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0007_fetchhistory_http_validators"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Payload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("app", models.CharField(max_length=50, verbose_name="dalec app")),
+                (
+                    "content_type",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="content type"
+                    ),
+                ),
+                (
+                    "content_id",
+                    models.CharField(
+                        help_text="ID of the content inside the external app.",
+                        max_length=255,
+                        verbose_name="app's content id",
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(
+                        help_text="Hash of the content data, used to avoid useless updates.",
+                        max_length=64,
+                        verbose_name="digest",
+                    ),
+                ),
+                (
+                    "content_data",
+                    JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder),
+                ),
+            ],
+            options={
+                "verbose_name": "Payload",
+                "verbose_name_plural": "Payloads",
+                "abstract": False,
+                "unique_together": {("app", "content_type", "content_id")},
+            },
+        ),
+    ]
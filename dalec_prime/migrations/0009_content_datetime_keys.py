@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:03
+
+from django.db import migrations
+
+try:
+    # Django imports
+    from django.db.models import JSONField  # type: ignore
+except ImportError:
+    from django_jsonfield_backport.models import JSONField  # type: ignore
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0008_payload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="content",
+            name="datetime_keys",
+            field=JSONField(
+                blank=True,
+                default=list,
+                help_text="Keys of the content data which are datetimes, converted back to datetimes when contents are loaded (see DALEC_TYPED_DATES).",
+                verbose_name="datetime keys",
+            ),
+        ),
+    ]
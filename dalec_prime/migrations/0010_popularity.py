@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0009_content_datetime_keys"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="refreshjob",
+            options={
+                "ordering": ("-priority", "creation_dt"),
+                "verbose_name": "Refresh job",
+                "verbose_name_plural": "Refresh jobs",
+            },
+        ),
+        migrations.AddField(
+            model_name="fetchhistory",
+            name="views",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Number of times contents have been displayed since the last fetch.",
+                verbose_name="views",
+            ),
+        ),
+        migrations.AddField(
+            model_name="refreshjob",
+            name="priority",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Jobs with the highest priority are claimed first by workers.",
+                verbose_name="priority",
+            ),
+        ),
+    ]
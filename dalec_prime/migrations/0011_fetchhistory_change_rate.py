@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0010_popularity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fetchhistory",
+            name="change_rate",
+            field=models.FloatField(
+                blank=True,
+                help_text="Moving average of the fetches which changed contents (between 0 and 1), used to adapt the TTL (see DALEC_TTL_MIN and DALEC_TTL_MAX).",
+                null=True,
+                verbose_name="change rate",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dalec_prime", "0011_fetchhistory_change_rate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refreshjob",
+            name="force",
+            field=models.BooleanField(
+                default=False,
+                help_text="Refresh contents even if their TTL did not expire yet (eg. popular contents refreshed ahead of expiry).",
+                verbose_name="force",
+            ),
+        ),
+    ]
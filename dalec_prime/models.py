@@ -1,8 +1,10 @@
 # DALEC imports
 from dalec.models import ContentBase
 from dalec.models import FetchHistoryBase
+from dalec.models import PayloadBase
+from dalec.models import RefreshJobBase
 
-__all__ = ["Content", "FetchHistory"]
+__all__ = ["Content", "FetchHistory", "RefreshJob", "Payload"]
 
 
 class Content(ContentBase):
@@ -11,3 +13,11 @@ class Content(ContentBase):
 
 class FetchHistory(FetchHistoryBase):
     pass
+
+
+class RefreshJob(RefreshJobBase):
+    pass
+
+
+class Payload(PayloadBase):
+    pass
@@ -0,0 +1,7 @@
+# Django imports
+from django.apps import AppConfig
+
+
+class DalecLoadtestConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "dalec_loadtest"
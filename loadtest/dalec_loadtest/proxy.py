@@ -0,0 +1,43 @@
+# Future imports
+from __future__ import annotations
+
+# Standard libs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict
+
+# Django imports
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+# DALEC imports
+from dalec.proxy import Proxy
+
+__all__ = ["LoadtestProxy"]
+
+
+class LoadtestProxy(Proxy):
+    """
+    Proxy fetching contents from the stub upstream of the load test (see `upstream.py`).
+    Only one content type ("item") with an optional channel ("project").
+    """
+
+    app = "loadtest"
+
+    def _fetch(
+        self, nb: int, content_type: str, channel: str, channel_object: str
+    ) -> Dict[str, dict]:
+        url = "%s/%s/%s/%s" % (
+            settings.LOADTEST_UPSTREAM_URL,
+            content_type,
+            channel or "-",
+            channel_object or "-",
+        )
+        response = self.http_get(url, params={"nb": nb}, timeout=30)
+        contents = {}
+        for item in response.json():
+            item["last_update_dt"] = parse_datetime(item["last_update_dt"])
+            item["creation_dt"] = parse_datetime(item["creation_dt"])
+            contents[item["id"]] = item
+        return contents
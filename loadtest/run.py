@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Load test of dalec: start the stub upstream (see upstream.py) and a threaded WSGI server of the
+load test project, then send concurrent requests to dalec's view (ajax refreshes) and to a page
+using the `dalec` template tag, and report throughput and latencies.
+Everything runs locally and offline.
+"""
+
+import argparse
+from collections import Counter
+import json
+import os
+import random
+from socketserver import ThreadingMixIn
+import sys
+import tempfile
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.request import Request
+from urllib.request import urlopen
+from wsgiref.simple_server import WSGIRequestHandler
+from wsgiref.simple_server import WSGIServer
+from wsgiref.simple_server import make_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+from upstream import UpstreamConfig  # noqa: E402
+from upstream import start_upstream  # noqa: E402
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def start_django(nb_objects: int, ttl: int, upstream_url: str, db_path: str) -> str:
+    """
+    Setup the load test project, create its tables and serve it in a thread. Return its url.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+    os.environ["LOADTEST_UPSTREAM_URL"] = upstream_url
+    os.environ["LOADTEST_OBJECTS"] = str(nb_objects)
+    os.environ["LOADTEST_TTL"] = str(ttl)
+    os.environ["LOADTEST_DB"] = db_path
+
+    import django
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    server = make_server(
+        "127.0.0.1",
+        0,
+        get_wsgi_application(),
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:%d" % server.server_address[1]
+
+
+def view_request(base_url: str, nb_objects: int, page_objects: int) -> Request:
+    """
+    Ajax refresh of a dalec of `page_objects` channel objects, like main.js does it
+    """
+    channel_objects = [str(obj) for obj in random.sample(range(nb_objects), page_objects)]
+    return Request(
+        "%s/dalec/loadtest/item/project/" % base_url,
+        data=json.dumps({"channelObjects": channel_objects}).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Accept": "text/html"},
+        method="POST",
+    )
+
+
+def tag_request(base_url: str, nb_objects: int, page_objects: int) -> Request:
+    """
+    Display of a page using the `dalec` template tag
+    """
+    return Request("%s/page/?objects=%d" % (base_url, page_objects))
+
+
+SCENARIOS = {
+    "view": [view_request],
+    "tag": [tag_request],
+    "mixed": [view_request, tag_request],
+}
+
+
+def worker(
+    base_url: str, args: argparse.Namespace, stop_at: float, results: list, lock: threading.Lock
+) -> None:
+    build_requests = SCENARIOS[args.scenario]
+    local_results = []
+    while time.monotonic() < stop_at:
+        request = random.choice(build_requests)(base_url, args.objects, args.page_objects)
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=60) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        except URLError:
+            status = "connection error"
+        local_results.append((time.perf_counter() - start, status))
+    with lock:
+        results.extend(local_results)
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Nearest rank percentile of sorted values
+    """
+    index = max(0, min(len(values) - 1, int(round(percent / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def report(results: list, duration: float, config: UpstreamConfig) -> None:
+    latencies = sorted(latency for latency, status in results)
+    statuses = Counter(status for latency, status in results)
+    print("requests:     %d in %.1fs" % (len(results), duration))
+    print("throughput:   %.1f req/s" % (len(results) / duration))
+    if latencies:
+        for percent in (50, 95, 99):
+            print("p%d latency:  %.1f ms" % (percent, percentile(latencies, percent) * 1000))
+        print("max latency:  %.1f ms" % (latencies[-1] * 1000))
+    print("statuses:     %s" % ", ".join("%s: %d" % item for item in sorted(statuses.items())))
+    print("upstream:     %d requests, %d errors" % (config.nb_requests, config.nb_errors))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--duration", type=float, default=10, help="seconds (default: 10)")
+    parser.add_argument("--concurrency", type=int, default=10, help="clients (default: 10)")
+    parser.add_argument("--objects", type=int, default=100, help="channel objects (default: 100)")
+    parser.add_argument(
+        "--page-objects", type=int, default=1, help="channel objects by dalec (default: 1)"
+    )
+    parser.add_argument("--ttl", type=int, default=60, help="DALEC_TTL (default: 60)")
+    parser.add_argument("--latency", type=float, default=50, help="upstream ms (default: 50)")
+    parser.add_argument("--jitter", type=float, default=10, help="upstream ms (default: 10)")
+    parser.add_argument("--error-rate", type=float, default=0, help="upstream (default: 0)")
+    parser.add_argument(
+        "--payload-size", type=int, default=1024, help="bytes by content (default: 1024)"
+    )
+    parser.add_argument("--change-rate", type=float, default=0.1, help="upstream (default: 0.1)")
+    parser.add_argument("--db", default=None, help="SQLite file (default: a temporary one)")
+    args = parser.parse_args()
+
+    config = UpstreamConfig(
+        args.latency, args.jitter, args.error_rate, args.payload_size, args.change_rate
+    )
+    upstream = start_upstream(config)
+    with tempfile.TemporaryDirectory() as directory:
+        base_url = start_django(
+            args.objects,
+            args.ttl,
+            "http://127.0.0.1:%d" % upstream.server_address[1],
+            args.db or os.path.join(directory, "dalec-loadtest.sqlite3"),
+        )
+        results: list = []
+        lock = threading.Lock()
+        start = time.monotonic()
+        threads = [
+            threading.Thread(
+                target=worker, args=(base_url, args, start + args.duration, results, lock)
+            )
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report(results, time.monotonic() - start, config)
+
+
+if __name__ == "__main__":
+    main()
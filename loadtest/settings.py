@@ -0,0 +1,54 @@
+"""
+Settings of the load test project (see run.py)
+"""
+
+import os
+
+import django
+
+SECRET_KEY = "EX-TER-MI-NA-TE"
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+USE_TZ = True
+
+INSTALLED_APPS = [
+    "django.contrib.contenttypes",
+    "dalec_loadtest",
+    "dalec_prime",
+    "dalec",
+]
+
+if django.VERSION < (3, 2):
+    INSTALLED_APPS.append("django_jsonfield_backport")
+
+ROOT_URLCONF = "urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {"context_processors": ["django.template.context_processors.request"]},
+    }
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("LOADTEST_DB", "dalec-loadtest.sqlite3"),
+        # concurrent refreshes wait for the lock instead of failing at once
+        "OPTIONS": {"timeout": 30},
+    }
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "root": {"handlers": ["console"], "level": "ERROR"},
+}
+
+LOADTEST_UPSTREAM_URL = os.environ.get("LOADTEST_UPSTREAM_URL", "http://127.0.0.1:8001")
+LOADTEST_OBJECTS = int(os.environ.get("LOADTEST_OBJECTS", 100))
+
+DALEC_TTL = int(os.environ.get("LOADTEST_TTL", 60))
+DALEC_AJAX_REFRESH = False
@@ -0,0 +1,124 @@
+"""
+Stub HTTP upstream of the load test: answers `GET /<content_type>/<channel>/<object>?nb=N` with
+a JSON list of N contents, after a configurable latency, with a configurable error rate,
+payload size and change rate.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import json
+import random
+import threading
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+import time
+
+BASE_DT = datetime(2021, 12, 24, 12, tzinfo=timezone.utc)
+
+
+class UpstreamConfig:
+    def __init__(
+        self,
+        latency: float = 50,
+        jitter: float = 10,
+        error_rate: float = 0,
+        payload_size: int = 1024,
+        change_rate: float = 0.1,
+    ) -> None:
+        self.latency = latency  # ms
+        self.jitter = jitter  # ms
+        self.error_rate = error_rate
+        self.payload_size = payload_size  # bytes of the body of each content
+        self.change_rate = change_rate  # probability that a response has an updated content
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.nb_requests = 0
+        self.nb_errors = 0
+
+    def get_version(self, key: str) -> int:
+        with self.lock:
+            self.nb_requests += 1
+            version = self.versions.get(key, 0)
+            if random.random() < self.change_rate:
+                version += 1
+            self.versions[key] = version
+            return version
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    config = UpstreamConfig()
+
+    def do_GET(self) -> None:
+        config = self.config
+        time.sleep(max(0, random.gauss(config.latency, config.jitter)) / 1000)
+        if random.random() < config.error_rate:
+            with config.lock:
+                config.nb_errors += 1
+            self.send_error(503)
+            return
+        url = urlsplit(self.path)
+        nb = int(parse_qs(url.query).get("nb", ["10"])[0])
+        key = url.path.strip("/").replace("/", "-")
+        version = config.get_version(key)
+        body = json.dumps(
+            [self.get_content(key, i, version) for i in range(nb)], separators=(",", ":")
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_content(self, key: str, i: int, version: int) -> dict:
+        creation_dt = BASE_DT - timedelta(hours=i)
+        # only the last content changes with new versions
+        last_update_dt = creation_dt + timedelta(seconds=version if i == 0 else 0)
+        return {
+            "id": "%s-%d" % (key, i),
+            "creation_dt": creation_dt.isoformat(),
+            "last_update_dt": last_update_dt.isoformat(),
+            "title": "Content %d of %s (v%d)" % (i, key, version if i == 0 else 0),
+            "body": "x" * self.config.payload_size,
+        }
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def start_upstream(config: UpstreamConfig, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the stub upstream in a thread and return its server (see `server_address`)
+    """
+    handler = type("Handler", (UpstreamHandler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=50, help="ms (default: 50)")
+    parser.add_argument("--jitter", type=float, default=10, help="ms (default: 10)")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--payload-size", type=int, default=1024)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    server = start_upstream(
+        UpstreamConfig(
+            args.latency, args.jitter, args.error_rate, args.payload_size, args.change_rate
+        ),
+        args.port,
+    )
+    print("Stub upstream listening on http://127.0.0.1:%d" % server.server_address[1])
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
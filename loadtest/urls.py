@@ -0,0 +1,24 @@
+"""
+Urls of the load test project: dalec's views and a page displaying contents with the `dalec`
+template tag
+"""
+
+import json
+import random
+
+from django.conf import settings
+from django.shortcuts import render
+from django.urls import include, path
+
+
+def page(request):
+    nb = int(request.GET.get("objects", 1))
+    channel_objects = random.sample(range(settings.LOADTEST_OBJECTS), nb)
+    context = {"channel_objects": json.dumps([str(obj) for obj in channel_objects])}
+    return render(request, "loadtest/page.html", context)
+
+
+urlpatterns = [
+    path("dalec/", include("dalec.urls")),
+    path("page/", page),
+]
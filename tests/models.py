@@ -1,3 +1,4 @@
+from dalec.fields import CompressedJSONField
 from dalec.models import ContentBase
 from dalec.models import FetchHistoryBase
 
@@ -8,3 +9,7 @@ class Content(ContentBase):
 
 class FetchHistory(FetchHistoryBase):
     pass
+
+
+class CompressedContent(ContentBase):
+    content_data = CompressedJSONField()
@@ -0,0 +1,26 @@
+from django.utils.timezone import now
+
+from dalec.proxy import Proxy
+
+
+class DalekArmy(Proxy):
+    """
+    Fetch daleks of many ships at once
+    """
+
+    app = "dalek_army"
+    nb_fetch_many = 0
+
+    def _fetch(self, nb, content_type, channel, channel_object):
+        return self._fetch_many(nb, content_type, channel, [channel_object])[channel_object]
+
+    def _fetch_many(self, nb, content_type, channel, channel_objects):
+        self.nb_fetch_many += 1
+        return {ship: self.get_daleks(ship) for ship in channel_objects if ship != "ghost"}
+
+    def get_daleks(self, ship):
+        daleks = {}
+        for i in range(3):
+            dalek_id = "%s-%d" % (ship, i)
+            daleks[dalek_id] = {"id": dalek_id, "creation_dt": now(), "last_update_dt": now()}
+        return daleks
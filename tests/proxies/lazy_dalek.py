@@ -0,0 +1,13 @@
+from dalec.proxy import Proxy
+
+
+class LazyDalek(Proxy):
+    """
+    Fetch daleks from Skaro, only if they changed since the last time
+    """
+
+    app = "lazy_dalek"
+
+    def _fetch(self, nb, content_type, channel, channel_object):
+        response = self.http_get("http://skaro.test/daleks", params={"limit": nb})
+        return {dalek["id"]: dalek for dalek in response.json()}
@@ -1,26 +1,64 @@
+import json
+import os
+import tempfile
 import time
+from contextlib import contextmanager, nullcontext
 from copy import copy
+from datetime import timedelta
 from importlib import reload
+from io import StringIO
+from unittest import mock, skipIf
 
 from bs4 import BeautifulSoup
 from django.apps import apps
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.template import Context, Template
-from django.template.loader import get_template
-from django.test import Client, TestCase
+from django.template.loader import get_template, select_template
+from django.template.response import TemplateResponse
+from django.test import Client, RequestFactory, TestCase
 from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.timezone import now
 
 from dalec import settings as app_settings
-from dalec.proxy import ProxyPool
+from dalec.cache import ObjectListCache, get_object_list_cache
+from dalec.fields import CompressedJSON
+from dalec.models import get_content_model
+from dalec.pagination import KeyTransform
+from dalec.popularity import view_counter
+from dalec.proxy import ProxyPool, RefreshManyError, parse_rate
+from dalec.queue import claim_jobs, enqueue, enqueue_many, get_refresh_job_model, process_jobs
+from dalec.renderers import get_renderer
+from dalec.routers import ReplicaRouter, is_pinned
+from dalec.templatetags.dalec import to_datetime
 from dalec.tests_utils import DalecTestCaseMixin
+from dalec.timing import RequestTimings, ServerTimingMiddleware
 from dalec.views import FetchContentView
 
 __all__ = ["DalecTests"]
 
 
+@contextmanager
+def run_on_commit_callbacks(using=DEFAULT_DB_ALIAS):
+    """
+    Run `transaction.on_commit` callbacks registered in the block, which are never run in a
+    `TestCase` (same as `captureOnCommitCallbacks(execute=True)` of Django >= 3.2)
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for callback in callbacks:
+        callback[1]()
+
+
 class DalecTests(DalecTestCaseMixin, TestCase):
     @override_settings(
         DALEC_EXAMPLE_NB_CONTENTS_KEPT=15,
@@ -460,6 +498,948 @@ class DalecTests(DalecTestCaseMixin, TestCase):
         ]
         self.assertEqual(template_names, expected)
 
+    def test_renderer_same_output_as_view(self):
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "half", channel_object="2021-12-24 12:00")
+        proxy.refresh("hour", "half", channel_object="2021-12-25 12:00")
+        paginated = []
+        for kwargs in (
+            {"channel": "half", "channel_objects": ["2021-12-24 12:00"]},
+            {"channel": "half", "channel_objects": ["2021-12-24 12:00", "2021-12-25 12:00"]},
+            {"channel": "half", "channel_objects": ["2021-12-24 12:00"], "ordered_by": "-id"},
+            {"channel": "quarter", "template": "faceof"},
+            {},
+        ):
+            dalec_view = FetchContentView(_dalec_template=kwargs.get("template", None))
+            dalec_view.setup(
+                None,
+                app="example",
+                content_type="hour",
+                channel=kwargs.get("channel", None),
+                channel_objects=kwargs.get("channel_objects", None),
+                page=1,
+                ordered_by=kwargs.get("ordered_by", None),
+            )
+            dalec_view.object_list = dalec_view.get_queryset()
+            context = dalec_view.get_context_data()
+            expected = select_template(dalec_view.get_template_names()).render(context)
+            renderer = get_renderer("example", "hour", **kwargs)
+            self.assertIs(renderer, get_renderer("example", "hour", **kwargs))
+            self.assertEqual(renderer.render(), expected)
+            renderer_context = renderer.get_context_data(context["object_list"])
+            self.assertLessEqual(set(context), set(renderer_context))
+            # same pagination as the view (and the `dalec` tag which used it)
+            self.assertEqual(renderer_context["is_paginated"], context["is_paginated"])
+            self.assertEqual(renderer_context["paginator"].count, context["paginator"].count)
+            self.assertEqual(
+                renderer_context["paginator"].num_pages, context["paginator"].num_pages
+            )
+            self.assertEqual(renderer_context["page_obj"].number, context["page_obj"].number)
+            self.assertEqual(
+                renderer_context["page_obj"].has_next(), context["page_obj"].has_next()
+            )
+            self.assertEqual(list(renderer_context["page_obj"]), list(context["page_obj"]))
+            paginated.append(renderer_context["is_paginated"])
+        self.assertEqual(paginated, [False, True, False, False, False])
+        # contents are only counted if the template uses it
+        with self.assertNumQueries(1):
+            renderer.render()
+        # templates are resolved at each rendering: edited ones are reloaded in DEBUG mode
+        with mock.patch("dalec.renderers.select_template", wraps=select_template) as resolve:
+            renderer.render()
+            renderer.render()
+        self.assertEqual(resolve.call_count, 2)
+
+    @skipIf(KeyTransform is None, "keys of content_data can only be selected since Django 3.1")
+    def test_only_content_fields(self):
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        self.content_model.objects.update(content_data={"id": "42", "full": {"a": [1]}, "b": 1})
+        qs = self.content_model.objects.only_content_fields(["id", "full", "missing"])
+        content = qs.first()
+        self.assertEqual(content.content_data, {"id": "42", "full": {"a": [1]}, "missing": None})
+        self.assertEqual(qs.filter(pk=content.pk).get().content_data["id"], "42")
+
+        html = (
+            "{% load dalec %}"
+            "{% dalec 'example' 'hour' channel='quarter' channel_object='2021-12-24 12:00' "
+            "template='faceof' fields='[\"id\"]' %}"
+        )
+        with self.assertNumQueries(1):
+            output = Template(html).render(Context({}))
+        self.assertIn("face of Boe", output)
+
+    @override_settings(DALEC_EXAMPLE_HOUR_LIST_FIELDS=["id"])
+    def test_view_list_fields(self):
+        reload(app_settings)
+        dalec_view = FetchContentView()
+        dalec_view.setup(None, app="example", content_type="hour", channel="quarter")
+        self.assertEqual(dalec_view.dalec_fields, ["id"])
+        self.assertEqual(dalec_view.get_queryset()._content_fields, {"id": "_content_data_0"})
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        response = Client().get(reverse("dalec_fetch_content", kwargs=kwargs))
+        self.assertEqual(response.status_code, 200)
+        for content in response.context["object_list"]:
+            self.assertEqual(list(content.content_data.keys()), ["id"])
+
+    def test_related_objects_prefetched(self):
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        related_objects = list(ContentType.objects.all()[:10])
+        for content, related_object in zip(self.content_model.objects.all(), related_objects):
+            content.dj_content_obj = related_object
+            content.dj_channel_obj = related_object
+            content.save()
+        ContentType.objects.clear_cache()
+
+        html = (
+            "{% load dalec %}"
+            "{% dalec 'example' 'hour' channel='quarter' channel_object='2021-12-24 12:00' %}"
+        )
+        Template(html).render(Context({}))
+        # contents + 1 query by content type of related objects
+        with self.assertNumQueries(3):
+            output = Template(html).render(Context({}))
+        for related_object in related_objects:
+            self.assertIn(str(related_object), output)
+
+    def test_dalec_templatetags_rendered_once_by_request(self):
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        html = (
+            "{% load dalec %}"
+            "{% dalec 'example' 'hour' channel='quarter' channel_object='2021-12-24 12:00' %}"
+            "{% for i in '123' %}"
+            "{% dalec 'example' 'hour' 'quarter' channel_objects='[\"2021-12-24 12:00\"]' %}"
+            "{% endfor %}"
+        )
+        request = RequestFactory().get("/")
+        with self.assertNumQueries(1):
+            output = Template(html).render(Context({"request": request}))
+        soup = BeautifulSoup(output, "html.parser")
+        self.assertEqual(len(soup.find_all(class_="dalec-list")), 4)
+        self.assertEqual(len(soup.find_all(class_="dalec-item")), 40)
+        # without request, there is no memo
+        with self.assertNumQueries(4):
+            Template(html).render(Context({}))
+
+    def test_refresh_queue(self):
+        job_model = get_refresh_job_model()
+        enqueue("example", "hour", "quarter", "2021-12-24 12:00")
+        enqueue("example", "hour", "quarter", "2021-12-24 12:00")
+        enqueue("example", "yolo")
+        self.assertEqual(job_model.objects.count(), 2)
+
+        jobs = claim_jobs(1)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(len(claim_jobs(1)), 1)
+        self.assertEqual(claim_jobs(), [])
+
+        job_model.objects.update(claimed_dt=None)
+        with override_settings(DALEC_WORKER_MAX_ATTEMPTS=2):
+            reload(app_settings)
+            call_command("dalec_worker", once=True, verbosity=0, stderr=StringIO())
+            self.assertEqual(self.content_model.objects.count(), 10)
+            failed_job = job_model.objects.get()
+            self.assertEqual(failed_job.app, "example")
+            self.assertEqual(failed_job.attempts, 1)
+            self.assertIn("Invalid content_type", failed_job.last_error)
+            # failed jobs are retried after DALEC_WORKER_CLAIM_TIMEOUT
+            self.assertIsNotNone(failed_job.claimed_dt)
+            call_command("dalec_worker", once=True, verbosity=0, stderr=StringIO())
+            self.assertEqual(job_model.objects.get().attempts, 1)
+            job_model.objects.update(claimed_dt=now() - timedelta(seconds=601))
+            call_command("dalec_worker", once=True, verbosity=0, stderr=StringIO())
+            self.assertEqual(job_model.objects.count(), 0)
+
+    @override_settings(DALEC_REFRESH_QUEUE=True)
+    def test_view_refresh_queue(self):
+        reload(app_settings)
+        job_model = get_refresh_job_model()
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        url = reverse("dalec_fetch_content", kwargs=kwargs)
+        client = Client()
+        channel_objects = '{"channelObjects": ["2021-12-25 00:00", "2021-12-24 00:00"]}'
+        for i in range(2):
+            response = client.post(url, channel_objects, content_type="application/json")
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(job_model.objects.count(), 2)
+        self.assertEqual(self.content_model.objects.count(), 0)
+
+        ProxyPool.get("example").refresh("hour", "quarter", "2021-12-24 00:00")
+        job_model.objects.all().delete()
+        client.post(url, channel_objects, content_type="application/json")
+        self.assertEqual(job_model.objects.get().channel_object, "2021-12-25 00:00")
+
+    @override_settings(DALEC_TTL=0)
+    def test_proxy_http_validators(self):
+        import requests
+
+        from .proxies.lazy_dalek import LazyDalek
+
+        reload(app_settings)
+        dalek = {"id": "1", "creation_dt": str(now()), "last_update_dt": str(now())}
+        responses = []
+
+        def fake_get(url, headers, **kwargs):
+            self.assertEqual(url, "http://skaro.test/daleks?limit=10")
+            expected_headers, status, body, response_headers = responses.pop(0)
+            self.assertEqual(headers, expected_headers)
+            response = requests.models.Response()
+            response.status_code = status
+            response._content = json.dumps(body).encode("utf-8")
+            response.headers.update(response_headers)
+            return response
+
+        proxy = LazyDalek()
+        with mock.patch("requests.get", side_effect=fake_get):
+            responses.append(({}, 200, [dalek], {"ETag": '"v1"'}))
+            self.assertEqual(proxy.refresh("dalek"), (1, 0, 0))
+            last_fetch = proxy.get_last_fetch("dalek", None, None)
+            self.assertEqual(last_fetch.http_validators["etag"], '"v1"')
+
+            responses.append(({"If-None-Match": '"v1"'}, 304, [], {}))
+            self.assertEqual(proxy.refresh("dalek"), (0, 0, 0))
+            self.assertGreater(
+                proxy.get_last_fetch("dalek", None, None).last_fetch_dt, last_fetch.last_fetch_dt
+            )
+
+            responses.append(({"If-None-Match": '"v1"'}, 200, [dalek], {}))
+            self.assertEqual(proxy.refresh("dalek"), (0, 0, 0))
+
+            dalek["name"] = "Davros"
+            responses.append(({}, 200, [dalek], {}))
+            self.assertEqual(proxy.refresh("dalek"), (0, 1, 0))
+            self.assertEqual(responses, [])
+        self.assertEqual(self.content_model.objects.get().content_data["name"], "Davros")
+
+    @override_settings(DALEC_TTL=0, DALEC_EXAMPLE_RATE_LIMIT="2/hour")
+    def test_proxy_rate_limit(self):
+        reload(app_settings)
+        cache.clear()
+        self.assertEqual(parse_rate("60/m"), (60, 60))
+        self.assertEqual(parse_rate("1000/day"), (1000, 86400))
+        proxy = ProxyPool.get("example")
+        self.assertEqual(proxy.refresh("hour", "quarter", "2021-12-24 12:00"), (10, 0, 0))
+        self.assertEqual(proxy.refresh("hour", "quarter", "2021-12-25 12:00"), (10, 0, 0))
+        self.assertEqual(
+            proxy.refresh("hour", "quarter", "2021-12-26 12:00"), (False, False, False)
+        )
+        self.assertEqual(self.fetch_history_model.objects.count(), 2)
+        cache.clear()
+        self.assertEqual(proxy.refresh("hour", "quarter", "2021-12-26 12:00"), (10, 0, 0))
+
+        # token bucket: refilled continuously, never more than 2 refreshes at once
+        cache.clear()
+        start = time.time()
+        with mock.patch("dalec.proxy.time.time") as mocked_time:
+            mocked_time.return_value = start
+            acquired = [proxy.acquire_rate_limit("hour") for i in range(3)]
+            self.assertEqual(acquired, [True, True, False])
+            mocked_time.return_value = start + 1800
+            self.assertEqual([proxy.acquire_rate_limit("hour") for i in range(2)], [True, False])
+            mocked_time.return_value = start + 7200
+            acquired = [proxy.acquire_rate_limit("hour") for i in range(3)]
+            self.assertEqual(acquired, [True, True, False])
+        # a busy bucket is not used
+        cache.add("dalec:rate:example:lock", True)
+        with mock.patch("dalec.proxy.time.sleep"):
+            self.assertFalse(proxy.acquire_rate_limit("hour"))
+        cache.clear()
+
+    def test_proxy_refresh_many(self):
+        from .proxies.dalek_army import DalekArmy
+
+        proxy = DalekArmy()
+        self.assertEqual(proxy.refresh("dalek", "ship", "dreadnought"), (3, 0, 0))
+        self.assertEqual(proxy.nb_fetch_many, 1)
+        results = proxy.refresh_many("dalek", "ship", ["dreadnought", "saucer", "ghost"])
+        self.assertEqual(proxy.nb_fetch_many, 2)
+        self.assertEqual(
+            results,
+            {"dreadnought": (False, False, False), "saucer": (3, 0, 0), "ghost": (0, 0, 0)},
+        )
+        self.assertEqual(self.fetch_history_model.objects.filter(app="dalek_army").count(), 3)
+        results = proxy.refresh_many("dalek", "ship", ["saucer", "ghost"])
+        self.assertEqual(proxy.nb_fetch_many, 2)
+
+        # channel objects are stored one by one: a failure does not prevent others to be stored
+        store_contents = proxy.store_contents
+
+        def store_or_exterminate(contents, content_type, channel, channel_object):
+            if channel_object in ("cruiser", "mothership"):
+                raise RuntimeError("exterminate")
+            return store_contents(contents, content_type, channel, channel_object)
+
+        with mock.patch.object(proxy, "store_contents", side_effect=store_or_exterminate):
+            with self.assertRaises(RefreshManyError) as raised:
+                proxy.refresh_many("dalek", "ship", ["cruiser", "scout"])
+        self.assertEqual(raised.exception.results, {"scout": (3, 0, 0)})
+        self.assertEqual(list(raised.exception.errors), ["cruiser"])
+        self.assertEqual(
+            self.content_model.objects.filter(channel_object__in=["cruiser", "scout"]).count(), 3
+        )
+
+        # and only jobs of failed channel objects are retried
+        registered = ProxyPool.unregister("dalek_army")
+        self.addCleanup(ProxyPool.register, registered or DalekArmy, override=True)
+        ProxyPool.register(proxy)
+        enqueue_many(
+            ("dalek_army", "dalek", "ship", ship) for ship in ("frigate", "mothership", "shuttle")
+        )
+        with mock.patch.object(proxy, "store_contents", side_effect=store_or_exterminate):
+            failed = process_jobs(claim_jobs(10), batch_commit=True)
+        self.assertEqual([job.channel_object for job in failed], ["mothership"])
+        self.assertIn("exterminate", failed[0].last_error)
+        self.assertEqual(
+            list(get_refresh_job_model().objects.values_list("channel_object", flat=True)),
+            ["mothership"],
+        )
+        self.assertEqual(
+            self.content_model.objects.filter(channel_object__in=["frigate", "shuttle"]).count(),
+            6,
+        )
+
+        # proxies without `_fetch_many` refresh channel objects one by one
+        proxy = ProxyPool.get("example")
+        results = proxy.refresh_many("hour", "quarter", ["2021-12-24 12:00", "2021-12-25 12:00"])
+        self.assertEqual(list(results.values()), [(10, 0, 0), (10, 0, 0)])
+
+    @override_settings(DALEC_CONTENT_MODEL="tests.CompressedContent")
+    def test_compressed_content_data(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        self.assertEqual(proxy.refresh("hour", "quarter", "2021-12-24 12:00"), (10, 0, 0))
+        content = self.content_model.objects.get(content_id="12h00")
+        self.assertIsInstance(content.__dict__["content_data"], CompressedJSON)
+        content.save()
+        self.assertEqual(content.content_data["id"], "12h00")
+        content = self.content_model.objects.defer("content_data").get(pk=content.pk)
+        self.assertEqual(content.content_data["id"], "12h00")
+
+        html = (
+            "{% load dalec %}"
+            "{% dalec 'example' 'hour' channel='quarter' channel_object='2021-12-24 12:00' %}"
+        )
+        output = Template(html).render(Context({}))
+        soup = BeautifulSoup(output, "html.parser")
+        self.assertEqual(len(soup.find_all(class_="dalec-item")), 10)
+
+        content.content_data = {"id": "12h00", "extermination": "🔥"}
+        content.save()
+        content.refresh_from_db()
+        self.assertEqual(content.content_data["extermination"], "🔥")
+
+    @override_settings(DALEC_EXAMPLE_HOUR_FIELDS=["night"])
+    def test_proxy_content_fields(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        content = self.content_model.objects.get(content_id="12h00")
+        self.assertEqual(
+            set(content.content_data.keys()), {"id", "creation_dt", "last_update_dt", "night"}
+        )
+
+        from .proxies.dalek_army import DalekArmy
+
+        proxy = DalekArmy()
+        proxy.content_fields = {"dalek": ["name"]}
+        self.assertEqual(proxy.get_content_fields("dalek"), ["name"])
+        self.assertIsNone(proxy.get_content_fields("ship"))
+
+    @override_settings(DALEC_PAYLOAD_MODEL="dalec_prime.Payload")
+    def test_shared_payloads(self):
+        reload(app_settings)
+        payload_model = apps.get_model("dalec_prime.Payload")
+        proxy = ProxyPool.get("example")
+        created, updated, deleted = proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        self.assertEqual((created, updated, deleted), (10, 0, 0))
+        created, updated, deleted = proxy.refresh("hour", "quarter", "2021-12-24 12:30")
+        self.assertEqual((created, updated, deleted), (10, 0, 0))
+        # 8 quarters are displayed in both channel objects but only stored once
+        self.assertEqual(self.content_model.objects.count(), 20)
+        self.assertEqual(payload_model.objects.count(), 12)
+        membership = self.content_model.objects.get(
+            channel_object="2021-12-24 12:00", content_id="12h00"
+        )
+        self.assertEqual(
+            set(membership.content_data.keys()), {"id", "creation_dt", "last_update_dt", "digest"}
+        )
+        # same payload: nothing to update
+        created, updated, deleted = proxy.refresh(
+            "hour", "quarter", "2021-12-24 12:00", force=True
+        )
+        self.assertEqual(updated, 0)
+
+        qs = self.content_model.objects.filter(channel_object="2021-12-24 12:00")
+        with self.assertNumQueries(2):
+            contents = list(qs.with_payloads().order_by_content("-id"))
+        self.assertEqual(contents[0].content_id, "12h00")
+        self.assertTrue(
+            contents[0].content_data["full_representation"].startswith("2021-12-24 12:00:00")
+        )
+        contents = list(qs.with_payloads(["id"]))
+        self.assertEqual(contents[0].content_data, {"id": contents[0].content_id})
+
+        # payloads are deleted with their last membership
+        with override_settings(DALEC_EXAMPLE_NB_CONTENTS_KEPT=2):
+            proxy.exterminate("hour", "quarter", "2021-12-24 12:00")
+        self.assertEqual(self.content_model.objects.count(), 12)
+        self.assertEqual(payload_model.objects.count(), 10)
+
+    def test_to_datetime_fast_paths(self):
+        date = to_datetime("2019-08-30T08:22:32.245-07:00")
+        self.assertEqual((date.hour, date.microsecond), (8, 245000))
+        self.assertEqual(date.utcoffset(), timedelta(hours=-7))
+        self.assertEqual(to_datetime("2019-08-30T08:22:32Z").utcoffset(), timedelta(0))
+        self.assertEqual(to_datetime("2019-08-30T08:22:32-0700"), date.replace(microsecond=0))
+        self.assertEqual(to_datetime("2019-08-30").day, 30)
+        self.assertIs(to_datetime(date), date)
+        # naive datetimes are still refused without an explicit format
+        with self.assertRaisesRegex(ValueError, "No given format matching"):
+            to_datetime("2019-08-30T08:22:32")
+        with self.assertRaisesRegex(ValueError, "No given format matching"):
+            to_datetime("2019-08-30 08:22:32+00:00")
+
+    @override_settings(DALEC_TYPED_DATES=True)
+    def test_typed_dates(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", "2021-12-24 12:00")
+        content = self.content_model.objects.get(content_id="12h00")
+        self.assertEqual(content.datetime_keys, ["creation_dt", "last_update_dt"])
+        self.assertEqual(content.content_data["creation_dt"], content.creation_dt)
+        self.assertEqual(
+            self.content_model.objects.only_content_fields(["creation_dt"])
+            .get(content_id="12h00")
+            .content_data["creation_dt"],
+            content.creation_dt,
+        )
+        created, updated, deleted = proxy.refresh(
+            "hour", "quarter", "2021-12-24 12:00", force=True
+        )
+        self.assertEqual(updated, 0)
+
+        with override_settings(DALEC_PAYLOAD_MODEL="dalec_prime.Payload"):
+            reload(app_settings)
+            proxy.refresh("hour", "quarter", "2021-12-24 12:30")
+            content = (
+                self.content_model.objects.filter(channel_object="2021-12-24 12:30")
+                .with_payloads()
+                .get(content_id="12h00")
+            )
+            self.assertEqual(content.content_data["creation_dt"], content.creation_dt)
+            created, updated, deleted = proxy.refresh(
+                "hour", "quarter", "2021-12-24 12:30", force=True
+            )
+            self.assertEqual(updated, 0)
+
+    @override_settings(DALEC_LIST_CACHE_ENTRIES=2)
+    def test_object_list_cache(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "half", channel_object="2021-12-24 12:00")
+        renderer = get_renderer("example", "hour", "half", ["2021-12-24 12:00"])
+        output = renderer.render()
+        with self.assertNumQueries(0):
+            self.assertEqual(renderer.render(), output)
+        object_list_cache = get_object_list_cache()
+        self.assertEqual(object_list_cache.stats()["hits"], 1)
+        self.assertEqual(object_list_cache.stats()["misses"], 1)
+        self.assertGreater(object_list_cache.stats()["bytes"], 0)
+
+        # the view shares the cache and a refresh invalidates it
+        client = Client()
+        url = reverse(
+            "dalec_fetch_content",
+            kwargs={
+                "app": "example",
+                "content_type": "hour",
+                "channel": "half",
+                "channel_object": "2021-12-24 13:00",
+            },
+        )
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with run_on_commit_callbacks():
+            created, updated, deleted = proxy.refresh(
+                "hour", "half", channel_object="2021-12-24 12:00", force=True
+            )
+            # versions change only once the refresh is committed
+            with self.assertNumQueries(0):
+                self.assertEqual(renderer.render(), output)
+        self.assertTrue(updated)
+        with self.assertNumQueries(1):
+            self.assertEqual(renderer.render(), output)
+
+        # entries are evicted by number and by size
+        get_renderer("example", "hour", "quarter").render()
+        self.assertEqual(object_list_cache.stats()["entries"], 2)
+        self.assertEqual(object_list_cache.stats()["evictions"], 1)
+        object_list_cache.max_bytes = 1
+        self.assertFalse(object_list_cache.set("big", (), [self.content_model()]))
+
+        # entries expire even if versions are not bumped (eg. by another process)
+        object_list_cache = ObjectListCache(2, 1024, ttl=60)
+        with mock.patch("dalec.cache.time") as clock:
+            clock.monotonic.return_value = 1000
+            self.assertTrue(object_list_cache.set("key", ("v1",), ["dalek"]))
+            clock.monotonic.return_value = 1059
+            self.assertEqual(object_list_cache.get("key", ("v1",)), ["dalek"])
+            clock.monotonic.return_value = 1060
+            self.assertIsNone(object_list_cache.get("key", ("v1",)))
+        self.assertEqual(object_list_cache.stats()["expirations"], 1)
+        self.assertEqual(object_list_cache.stats()["entries"], 0)
+        self.assertEqual(object_list_cache.stats()["bytes"], 0)
+
+    def test_object_list_cache_pagination(self):
+        # the cached first page keeps the pagination of the whole queryset
+        proxy = ProxyPool.get("example")
+        channel_objects = ["2021-12-24 12:00", "2021-12-25 12:00"]
+        proxy.refresh_many("hour", "half", channel_objects)
+        # 13 contents of 2 channel objects
+        pks = self.content_model.objects.values_list("pk", flat=True)
+        self.content_model.objects.filter(pk__in=list(pks[:7])).delete()
+        self.assertEqual(self.content_model.objects.count(), 13)
+
+        def get_context_data():
+            dalec_view = FetchContentView(_dalec_template=None)
+            dalec_view.setup(
+                None,
+                app="example",
+                content_type="hour",
+                channel="half",
+                channel_objects=channel_objects,
+                page=1,
+            )
+            dalec_view.object_list = dalec_view.get_queryset()
+            return dalec_view.get_context_data()
+
+        with self.settings(DALEC_NB_CONTENTS_KEPT=3):
+            reload(app_settings)
+            contexts = [get_context_data()]
+            with self.settings(DALEC_LIST_CACHE_ENTRIES=2):
+                reload(app_settings)
+                # cache miss then cache hit
+                contexts += [get_context_data(), get_context_data()]
+                self.assertEqual(get_object_list_cache().stats()["hits"], 1)
+                # the first page of contents loaded by keyset comes from the cache too
+                with self.settings(DALEC_EXAMPLE_LOAD_MORE=True):
+                    reload(app_settings)
+                    get_context_data()
+                    context = get_context_data()
+                    self.assertEqual(get_object_list_cache().stats()["hits"], 1)
+                    self.assertTrue(context["is_paginated"])
+                    self.assertTrue(context["next_cursor"])
+        reload(app_settings)
+        for context in contexts:
+            self.assertEqual(context["paginator"].count, 13)
+            self.assertTrue(context["is_paginated"])
+            self.assertTrue(context["page_obj"].has_next())
+            self.assertEqual(list(context["object_list"]), list(contexts[0]["object_list"]))
+            self.assertEqual(list(context["page_obj"]), list(contexts[0]["object_list"]))
+
+    @override_settings(DALEC_COUNT_VIEWS=True, DALEC_VIEWS_FLUSH_INTERVAL=3600, DALEC_HOT_VIEWS=2)
+    def test_popularity(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "half", channel_object="2021-12-24 12:00")
+        proxy.refresh("hour", "half", channel_object="2021-12-25 12:00")
+        t = Template(
+            """{% load dalec %}{% dalec "example" "hour" "half" "2021-12-24 12:00" %}"""
+        )
+        for i in range(3):
+            t.render(Context({}))
+        # views are buffered until they are flushed
+        fetch = self.fetch_history_model.objects.get(channel_object="2021-12-24 12:00")
+        self.assertEqual(fetch.views, 0)
+        self.assertEqual(view_counter.flush(), 1)
+        fetch.refresh_from_db()
+        self.assertEqual(fetch.views, 3)
+
+        # hot keys are refreshed first, before they expire
+        self.fetch_history_model.objects.update(last_fetch_dt=now() - timedelta(minutes=13))
+        enqueue("example", "hour", "half", "2021-12-25 12:00")
+        # already waiting jobs get the priority of their views
+        enqueue("example", "hour", "half", "2021-12-24 12:00")
+        call_command("dalec_schedule", verbosity=0)
+        jobs = claim_jobs(1)
+        self.assertEqual(jobs[0].channel_object, "2021-12-24 12:00")
+        self.assertEqual(jobs[0].priority, 3)
+        # cold keys are not scheduled
+        self.assertEqual(apps.get_model(app_settings.REFRESH_JOB_MODEL).objects.count(), 2)
+
+        # hot keys are fetched again even if their TTL did not expire yet
+        self.assertTrue(jobs[0].force)
+        scheduled_dt = fetch.last_fetch_dt
+        self.assertEqual(process_jobs(jobs), [])
+        fetch.refresh_from_db()
+        self.assertGreater(fetch.last_fetch_dt, scheduled_dt)
+        self.assertEqual(fetch.views, 0)
+        # cold keys are only refreshed once expired
+        cold_fetch = self.fetch_history_model.objects.get(channel_object="2021-12-25 12:00")
+        self.assertEqual(process_jobs(claim_jobs(1)), [])
+        self.assertEqual(
+            self.fetch_history_model.objects.get(pk=cold_fetch.pk).last_fetch_dt,
+            cold_fetch.last_fetch_dt,
+        )
+        # refreshed keys are not hot anymore
+        call_command("dalec_schedule", verbosity=0)
+        self.assertFalse(apps.get_model(app_settings.REFRESH_JOB_MODEL).objects.exists())
+
+    @override_settings(DALEC_EXAMPLE_TTL=600, DALEC_TTL_MIN=60, DALEC_TTL_MAX=3600)
+    def test_adaptive_ttl(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        self.assertEqual(proxy.get_ttl("hour"), 600)
+        proxy.refresh("hour", "half", channel_object="2021-12-24 12:00")
+        last_fetch = proxy.get_last_fetch("hour", "half", "2021-12-24 12:00")
+        # first fetch always creates contents
+        self.assertEqual(last_fetch.change_rate, 1)
+        self.assertEqual(proxy.get_ttl("hour", last_fetch), 60)
+
+        # nothing changes: the change rate decreases and the TTL grows
+        with mock.patch.object(proxy, "update_content", return_value=False):
+            proxy.refresh("hour", "half", channel_object="2021-12-24 12:00", force=True)
+        last_fetch.refresh_from_db()
+        self.assertAlmostEqual(last_fetch.change_rate, 0.7)
+        self.assertAlmostEqual(proxy.get_ttl("hour", last_fetch), 3600 - 3540 * 0.7)
+        last_fetch.last_fetch_dt = now() - timedelta(seconds=1000)
+        self.assertTrue(proxy.is_fresh("hour", last_fetch))
+
+    def test_refresh_transaction(self):
+        proxy = ProxyPool.get("example")
+        with mock.patch.object(proxy, "set_last_fetch", side_effect=RuntimeError("exterminate")):
+            with self.assertRaises(RuntimeError):
+                proxy.refresh("hour", "half", channel_object="2021-12-24 12:00")
+        # contents of a failed refresh are rolled back
+        self.assertFalse(self.content_model.objects.exists())
+        # but the fetch is registered if contents can not be stored
+        invalid = ValidationError("invalid content")
+        with mock.patch.object(proxy, "create_content", side_effect=invalid):
+            with self.assertRaises(ValidationError):
+                proxy.refresh("hour", "half", channel_object="2021-12-25 12:00")
+            with self.assertRaises(RefreshManyError) as raised:
+                proxy.refresh_many("hour", "half", ["2021-12-26 12:00"])
+        self.assertIsInstance(raised.exception.errors["2021-12-26 12:00"], ValidationError)
+        self.assertFalse(self.content_model.objects.exists())
+        for channel_object in ("2021-12-25 12:00", "2021-12-26 12:00"):
+            self.assertFalse(proxy.needs_refresh("hour", "half", channel_object))
+            # a failed fetch does not tell if contents changed
+            last_fetch = proxy.get_last_fetch("hour", "half", channel_object)
+            self.assertIsNone(last_fetch.change_rate)
+
+        enqueue("example", "hour", "half", "2021-12-24 12:00")
+        enqueue("nope", "hour")
+        failed = process_jobs(claim_jobs(10), batch_commit=True)
+        self.assertEqual([job.app for job in failed], ["nope"])
+        self.assertEqual(self.content_model.objects.count(), 10)
+
+    @override_settings(DALEC_TTL_GATE=True)
+    def test_ttl_gate(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        self.addCleanup(cache.clear)
+        with run_on_commit_callbacks():
+            created, updated, deleted = proxy.refresh("hour", "half", "2021-12-24 12:00")
+        self.assertEqual(created, 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                proxy.refresh("hour", "half", "2021-12-24 12:00"), (False, False, False)
+            )
+            self.assertFalse(proxy.needs_refresh("hour", "half", "2021-12-24 12:00"))
+            self.assertEqual(
+                proxy.refresh_many("hour", "half", ["2021-12-24 12:00"]),
+                {"2021-12-24 12:00": (False, False, False)},
+            )
+        # the DB is still used for other keys
+        self.assertTrue(proxy.needs_refresh("hour", "half", "2021-12-25 12:00"))
+
+    def test_proxy_entry_points(self):
+        try:
+            from importlib.metadata import EntryPoint
+        except ImportError:
+            try:
+                from importlib_metadata import EntryPoint
+            except ImportError:
+                self.skipTest("entry points require importlib_metadata on Python < 3.8")
+
+        from .proxies.dalek_army import DalekArmy
+
+        entry_points = {
+            "dalek_army": EntryPoint(
+                name="dalek_army",
+                value="tests.proxies.dalek_army:DalekArmy",
+                group="dalec.proxies",
+            ),
+            "cybermen": EntryPoint(
+                name="cybermen", value="dalec_cybermen.proxy:Proxy", group="dalec.proxies"
+            ),
+        }
+        registered = ProxyPool.unregister("dalek_army")
+        self.addCleanup(ProxyPool.register, registered or DalekArmy, override=True)
+        with mock.patch("dalec.proxy.get_proxy_entry_points", return_value=entry_points):
+            self.assertIn("cybermen", ProxyPool.get_available_apps())
+            self.assertNotIn("cybermen", ProxyPool.get_registered_apps())
+            self.assertIsInstance(ProxyPool.get("dalek_army"), DalekArmy)
+            with self.assertRaisesRegex(ValueError, "No proxy registered for app cybermen"):
+                ProxyPool.get("cybermen")
+
+    @skipIf(KeyTransform is None, "contents can only be sorted by keys since Django 3.1")
+    @override_settings(DALEC_EXAMPLE_LOAD_MORE=True)
+    def test_load_more(self):
+        reload(app_settings)
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", channel_object="2021-12-24 12:00")
+        # same sort key for some contents: pk breaks ties
+        ids = list(self.content_model.objects.values_list("pk", flat=True))
+        self.content_model.objects.filter(pk__in=ids[:4]).update(last_update_dt=now())
+        # contents without sort key (null, then missing) come last
+        for i, content in enumerate(self.content_model.objects.filter(pk__in=ids[3:8])):
+            content.content_data["rank"] = i % 3 if i < 4 else None
+            content.save()
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        url = reverse("dalec_fetch_content", kwargs=kwargs)
+        client = Client()
+        with override_settings(DALEC_EXAMPLE_NB_CONTENTS_KEPT=3):
+            reload(app_settings)
+            for ordered_by in (None, "id", "nope", "-rank"):
+                if ordered_by is None:
+                    expected = list(self.content_model.objects.order_by("-last_update_dt", "-pk"))
+                else:
+                    key = ordered_by.lstrip("-")
+                    groups = ([], [], [])
+                    for content in self.content_model.objects.all():
+                        value = content.content_data.get(key, None)
+                        groups[
+                            0 if value is not None else 1 if key in content.content_data else 2
+                        ].append(content)
+                    # values, then null values, then missing keys
+                    expected = []
+                    for i, group in enumerate(groups):
+                        expected += sorted(
+                            group,
+                            key=lambda c: (c.content_data[key], c.pk) if i == 0 else c.pk,
+                            reverse=ordered_by.startswith("-"),
+                        )
+                renderer = get_renderer(
+                    "example", "hour", "quarter", ["2021-12-24 12:00"], ordered_by=ordered_by
+                )
+                soup = BeautifulSoup(renderer.render(), "html.parser")
+                contents = [div.get_text(strip=True) for div in soup.select(".dalec-item")]
+                button = soup.select_one(".dalec-load-more")
+                while button is not None:
+                    response = client.post(
+                        url,
+                        data={
+                            "channelObjects": ["2021-12-24 12:00"],
+                            "orderedBy": ordered_by,
+                            "cursor": button["data-cursor"],
+                        },
+                        content_type="application/json",
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIsNone(response.context["paginator"])
+                    soup = BeautifulSoup(response.content, "html.parser")
+                    contents += [div.get_text(strip=True) for div in soup.select(".dalec-item")]
+                    button = soup.select_one(".dalec-load-more")
+                self.assertEqual(
+                    contents,
+                    [content.content_id for content in expected],
+                )
+
+            response = client.get(url, {"cursor": "invalid"})
+            self.assertEqual(response.status_code, 404)
+
+    @skipIf(KeyTransform is None, "contents can only be sorted by keys since Django 3.1")
+    @override_settings(
+        DALEC_EXAMPLE_LOAD_MORE=True,
+        DALEC_EXAMPLE_NB_CONTENTS_KEPT=3,
+        DALEC_EXAMPLE_HOUR_LIST_FIELDS=["full_representation"],
+    )
+    def test_load_more_sort_key_not_listed(self):
+        # the cursor does not depend on the keys of `content_data` selected for the list
+        reload(app_settings)
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        url = reverse("dalec_fetch_content", kwargs=kwargs)
+        client = Client()
+        # the first request refreshes contents
+        data = {"channelObjects": ["2021-12-24 12:00"], "orderedBy": "-id"}
+        contents = []
+        while True:
+            response = client.post(url, data=data, content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+            contents += [content.content_id for content in response.context["object_list"]]
+            data["cursor"] = response.context["next_cursor"]
+            if data["cursor"] is None:
+                break
+        self.assertEqual(
+            contents,
+            sorted(self.content_model.objects.values_list("content_id", flat=True), reverse=True),
+        )
+
+    @override_settings(DALEC_EXAMPLE_CONTENT_MODEL="tests.Content")
+    def test_content_model_by_app(self):
+        reload(app_settings)
+        app_content_model = apps.get_model("tests.Content")
+        self.assertIs(get_content_model("example"), app_content_model)
+        self.assertIs(get_content_model("other"), self.content_model)
+        proxy = ProxyPool.get("example")
+        self.assertIs(proxy.content_model, app_content_model)
+        proxy.refresh("hour", "quarter", channel_object="2021-12-24 12:00")
+        self.assertEqual(app_content_model.objects.count(), 10)
+        self.assertEqual(self.content_model.objects.count(), 0)
+
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        url = reverse("dalec_fetch_content", kwargs=kwargs)
+        response = Client().post(
+            url, data={"channelObjects": ["2021-12-24 13:00"]}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["object_list"]), 10)
+        for content in response.context["object_list"]:
+            self.assertIsInstance(content, app_content_model)
+        # the name of the list does not depend on the content model of the app
+        self.assertEqual(response.context["content_list"], response.context["object_list"])
+        queryset = apps.get_model("tests.CompressedContent").objects.all()
+        self.assertEqual(FetchContentView().get_context_object_name(queryset), "content_list")
+        output = get_renderer("example", "hour", "quarter", ["2021-12-24 12:00"]).render()
+        self.assertEqual(output.count('class="dalec-item"'), 10)
+
+        # refreshes of a batch are committed once by database of their contents
+        enqueue("example", "hour", "quarter", "2021-12-25 12:00")
+        enqueue("nope", "hour")
+        jobs = claim_jobs(10)
+        dbs = {app_content_model: "contents"}
+        with mock.patch("dalec.queue.router") as router, mock.patch(
+            "dalec.queue.transaction"
+        ) as transaction:
+            router.db_for_write.side_effect = lambda model: dbs.get(model, "default")
+            transaction.atomic.return_value = nullcontext()
+            failed = process_jobs(jobs, batch_commit=True)
+        self.assertEqual([job.app for job in failed], ["nope"])
+        self.assertEqual(
+            sorted(call[1]["using"] for call in transaction.atomic.call_args_list),
+            ["contents", "default"],
+        )
+
+    @override_settings(DALEC_REPLICAS=["replica"])
+    def test_replica_router(self):
+        reload(app_settings)
+        request_started.send(sender=self.__class__)
+        router = ReplicaRouter()
+        fetch_history_model = apps.get_model(app_settings.FETCH_HISTORY_MODEL)
+        self.assertFalse(is_pinned())
+        self.assertEqual(router.db_for_read(self.content_model), "replica")
+        self.assertEqual(router.db_for_read(fetch_history_model), "replica")
+        self.assertEqual(router.db_for_write(self.content_model), "default")
+        self.assertIsNone(router.db_for_read(apps.get_model("auth.User")))
+
+        # a request which refreshed contents reads its own writes
+        ProxyPool.get("example").refresh("hour", "quarter")
+        self.assertTrue(is_pinned())
+        self.assertEqual(router.db_for_read(self.content_model), "default")
+        self.assertEqual(router.db_for_read(fetch_history_model), "default")
+
+        # until the next request
+        request_started.send(sender=self.__class__)
+        self.assertFalse(is_pinned())
+        self.assertEqual(router.db_for_read(self.content_model), "replica")
+
+    def test_snapshot_dump_load(self):
+        proxy = ProxyPool.get("example")
+        proxy.refresh("hour", "quarter", channel_object="2021-12-24 12:00")
+        fetch_history_model = apps.get_model(app_settings.FETCH_HISTORY_MODEL)
+        expected = [
+            (content.content_id, content.last_update_dt, content.content_data)
+            for content in self.content_model.objects.order_by("content_id")
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dalec.ndjson.gz")
+            call_command("dalec_dump", path, chunk_size=3, verbosity=0)
+            call_command(
+                "dalec_dump", os.path.join(directory, "empty.gz"), apps=["other"], verbosity=0
+            )
+            self.content_model.objects.all().delete()
+            fetch_history_model.objects.all().delete()
+            out = StringIO()
+            call_command("dalec_load", path, chunk_size=3, stdout=out)
+        self.assertIn("10 dalec_prime.Content loaded", out.getvalue())
+        self.assertEqual(fetch_history_model.objects.count(), 1)
+        self.assertEqual(
+            [
+                (content.content_id, content.last_update_dt, content.content_data)
+                for content in self.content_model.objects.order_by("content_id")
+            ],
+            expected,
+        )
+        # loaded contents are found by the next refresh
+        created, updated, deleted = proxy.refresh(
+            "hour", "quarter", channel_object="2021-12-24 12:00", force=True
+        )
+        self.assertEqual((created, deleted), (0, 0))
+        self.assertEqual(self.content_model.objects.count(), 10)
+
+    @override_settings(
+        MIDDLEWARE=["dalec.timing.ServerTimingMiddleware"],
+        DALEC_TIMING_LOG_RATE=1,
+    )
+    def test_server_timing(self):
+        reload(app_settings)
+        kwargs = {"app": "example", "content_type": "hour", "channel": "quarter"}
+        url = reverse("dalec_fetch_content", kwargs=kwargs)
+        with self.assertLogs("dalec.timing", "INFO") as logs:
+            response = Client().post(
+                url, data={"channelObjects": ["2021-12-24 12:00"]}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        metrics = {
+            metric.split(";")[0]: metric for metric in response["Server-Timing"].split(", ")
+        }
+        for name in ("ttl", "fetch", "store", "prune", "list", "template", "render", "db"):
+            self.assertIn(name, metrics)
+        self.assertRegex(metrics["db"], r'^db;dur=[0-9.]+;desc="[1-9][0-9]* queries"$')
+        self.assertRegex(metrics["total"], r"^total;dur=[0-9.]+$")
+        self.assertIn(url, logs.output[0])
+
+        # other responses are left unchanged (and rendered by Django, after all middlewares)
+        request = RequestFactory().get("/")
+        response = ServerTimingMiddleware(
+            lambda request: TemplateResponse(request, "dalec_tests/test-quarter.html")
+        )(request)
+        self.assertFalse(response.is_rendered)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+        # durations of nested phases are not counted twice
+        timings = RequestTimings()
+        timings.start("outer")
+        timings.start("inner")
+        time.sleep(0.01)
+        timings.stop()
+        timings.stop()
+        self.assertLess(timings.phases["outer"], timings.phases["inner"])
+
+    def test_proxy_refresh_many_one_query(self):
+        proxy = ProxyPool.get("example")
+        channel_objects = ["2021-12-%02d 12:00" % day for day in range(1, 6)]
+        proxy.refresh_many("hour", "quarter", channel_objects)
+        # fresh contents: only one query to know it for all channel objects
+        with self.assertNumQueries(1):
+            results = proxy.refresh_many("hour", "quarter", channel_objects)
+        self.assertEqual(set(results.values()), {(False, False, False)})
+
+        self.fetch_history_model.objects.filter(channel_object=channel_objects[2]).update(
+            last_fetch_dt=now() - timedelta(seconds=app_settings.TTL + 1)
+        )
+        self.assertEqual(
+            list(proxy.get_expired("hour", "quarter", channel_objects)), [channel_objects[2]]
+        )
+        results = proxy.refresh_many("hour", "quarter", channel_objects)
+        self.assertEqual(
+            [channel_object for channel_object, result in results.items() if any(result)],
+            [channel_objects[2]],
+        )
+
 
 class DalecExampleTests(TestCase):
     @property
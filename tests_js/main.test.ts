@@ -1,4 +1,4 @@
-import { fetch_content } from "../dalec/static/dalec/js/main.js";
+import { fetch_content, load_more } from "../dalec/static/dalec/js/main.js";
 
 let dalecContainer: HTMLElement;
 
@@ -137,3 +137,35 @@ describe("fetch_content", () => {
     });
   });
 });
+
+describe("load_more", () => {
+  let button: HTMLButtonElement;
+
+  beforeAll(() => {
+    document.body.innerHTML = `
+                <div id="dalec-1" data-url="http://test.url" data-ordered-by="name"><div>first</div><button class="dalec-load-more" data-cursor="abc"></button></div>
+            `;
+    global.fetch = jest.fn(() =>
+      Promise.resolve({
+        ok: true,
+        text: () => Promise.resolve("<div>next</div>"),
+      }),
+    ) as jest.Mock;
+    dalecContainer = document.getElementById("dalec-1");
+    button = dalecContainer.querySelector(".dalec-load-more");
+    load_more(dalecContainer, button);
+  });
+
+  it("should call fetch with the cursor", () => {
+    expect(global.fetch).toHaveBeenCalledWith(
+      "http://test.url",
+      expect.objectContaining({
+        body: '{"orderedBy":"name","cursor":"abc"}',
+      }),
+    );
+  });
+
+  it("should append next contents in place of the button", () => {
+    expect(dalecContainer.innerHTML).toBe("<div>first</div><div>next</div>");
+  });
+});